@@ -0,0 +1,977 @@
+"""
+Enhanced Production Server v3 - Zero Cost Code Agent
+
+Unified orchestrator exposing OpenHands-, Manus- and Emergent-style
+execution modes (plus a hybrid combiner) behind the /api/v3 endpoints,
+with session tracking and a professional frontend.
+"""
+
+import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse
+from pydantic import BaseModel, constr
+
+try:
+    import orjson  # noqa: F401
+
+    from fastapi.responses import ORJSONResponse as _DefaultResponse
+except ImportError:
+    orjson = None
+    _DefaultResponse = JSONResponse
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+try:
+    from src.analysis_kernels import token_stats
+except ImportError:
+    token_stats = None
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.environ.get("REDIS_URL", "")
+VLLM_ENDPOINT = os.environ.get("VLLM_ENDPOINT", "http://localhost:8000")
+VLLM_MODEL = os.environ.get("VLLM_MODEL", "deepseek-ai/deepseek-coder-6.7b-instruct")
+
+# One shared client for all vLLM traffic: connections are pooled and
+# kept alive across requests instead of a fresh TCP (and TLS) handshake
+# per call. HTTP/2 multiplexing is used when the h2 extra is installed.
+_HTTPX_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+try:
+    _HTTPX = httpx.AsyncClient(
+        base_url=VLLM_ENDPOINT, http2=True, timeout=30.0, limits=_HTTPX_LIMITS
+    )
+except ImportError:
+    _HTTPX = httpx.AsyncClient(
+        base_url=VLLM_ENDPOINT, timeout=30.0, limits=_HTTPX_LIMITS
+    )
+
+
+def _session_dumps(payload: Dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _dump_session_bytes(state: "SessionState") -> bytes:
+    # orjson walks dataclasses natively; no asdict() deep copy needed.
+    if orjson is not None:
+        return orjson.dumps(
+            state,
+            option=orjson.OPT_SERIALIZE_DATACLASS | orjson.OPT_NAIVE_UTC,
+        )
+    return json.dumps(asdict(state)).encode("utf-8")
+
+
+def _session_loads(raw: bytes) -> Dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class ExecutionMode(str, Enum):
+    OPENHANDS = "openhands"
+    MANUS = "manus"
+    EMERGENT = "emergent"
+    HYBRID = "hybrid"
+
+
+# Plain dict lookup is much cheaper than Enum.__call__ on the request
+# hot path; unknown values fall back to hybrid in the endpoints.
+_MODE_FROM_STR = {mode.value: mode for mode in ExecutionMode}
+
+# Optional table of fully rendered results for the most common demo
+# prompts, shipped as precomputed.json next to this module. Keys are
+# (mode, 8-byte blake2b of the description); a hit skips the render and
+# combine pipeline entirely.
+_PRECOMPUTED_PATH = Path(__file__).with_name("precomputed.json")
+
+
+def _load_precomputed() -> Dict[Any, Dict[str, Any]]:
+    try:
+        raw = _PRECOMPUTED_PATH.read_bytes()
+    except OSError:
+        return {}
+    table = {}
+    for entry in _session_loads(raw):
+        digest = hashlib.blake2b(
+            entry["description"].encode("utf-8"), digest_size=8
+        ).digest()
+        table[(entry["mode"], digest)] = entry["result"]
+    return table
+
+
+_PRECOMPUTED = _load_precomputed()
+
+_id_counter = itertools.count()
+
+
+def _new_task_id() -> str:
+    # Task ids only need process-local uniqueness; a nanosecond stamp
+    # plus a counter avoids uuid4's syscall entropy draw per task.
+    return f"t{time.time_ns():x}{next(_id_counter):x}"
+
+
+@dataclass(slots=True, frozen=True)
+class TaskContext:
+    task_id: str
+    description: str
+    language: str = "python"
+    execution_mode: ExecutionMode = ExecutionMode.HYBRID
+    created_at: str = ""
+
+
+@dataclass(slots=True)
+class SessionState:
+    session_id: str
+    created_at: str
+    tasks: List[TaskContext] = field(default_factory=list)
+    status: str = "active"
+
+
+class SessionRequest(BaseModel):
+    session_id: Optional[str] = None
+
+
+class CodeGenerationRequest(BaseModel):
+    description: str
+    language: str = "python"
+    execution_mode: str = "hybrid"
+    session_id: Optional[str] = None
+
+
+class CodeAnalysisRequest(BaseModel):
+    # Reject pathological payloads at validation instead of formatting
+    # and hashing megabytes of code downstream.
+    code: constr(min_length=1, max_length=200_000)
+    task_type: str = "general"
+    execution_mode: str = "hybrid"
+    session_id: Optional[str] = None
+
+
+class ChatRequest(BaseModel):
+    message: str
+    execution_mode: str = "hybrid"
+    session_id: Optional[str] = None
+
+
+class VibeCodingRequest(BaseModel):
+    description: str
+    app_type: str = "web"
+
+
+# Static template text lives in module constants so each render is a
+# join of prebuilt segments with the two variable parts, not a rebuild
+# of the whole multi-KB literal.
+
+_LANG_SEP = "\nLanguage: "
+
+_OPENHANDS_HEAD = '''"""
+OpenHands-Style Implementation
+Task: '''
+
+_OPENHANDS_MID = '''
+"""
+
+import asyncio
+
+
+async def solve():
+    """Iterative agent loop: plan, act, observe, refine."""
+    plan = ["understand the task", "draft implementation", "test", "refine"]
+    for step in plan:
+        print(f"[openhands] {step}")
+    # Implementation for: '''
+
+_OPENHANDS_TAIL = '''
+    return "done"
+
+
+if __name__ == "__main__":
+    asyncio.run(solve())
+'''
+
+_MANUS_HEAD = '''"""
+Manus-Style Implementation
+Task: '''
+
+_MANUS_MID = '''
+"""
+
+
+def execute_pipeline():
+    """Tool-driven pipeline: decompose, delegate, assemble."""
+    stages = ("decompose", "delegate", "assemble", "verify")
+    results = {}
+    for stage in stages:
+        results[stage] = f"{stage} complete"
+    # Implementation for: '''
+
+_MANUS_TAIL = '''
+    return results
+
+
+if __name__ == "__main__":
+    print(execute_pipeline())
+'''
+
+_EMERGENT_HEAD = '''"""
+Emergent-Style Implementation
+Task: '''
+
+_EMERGENT_MID = '''
+"""
+
+
+class Solution:
+    """Conversational build-up: scaffold first, then fill in behavior."""
+
+    def __init__(self):
+        self.context = "'''
+
+_EMERGENT_TAIL = '''"
+
+    def run(self):
+        return f"solution for {self.context}"
+
+
+if __name__ == "__main__":
+    print(Solution().run())
+'''
+
+
+@lru_cache(maxsize=2048)
+def _openhands_code(description: str, language: str) -> str:
+    return "".join(
+        (
+            _OPENHANDS_HEAD,
+            description,
+            _LANG_SEP,
+            language,
+            _OPENHANDS_MID,
+            description,
+            _OPENHANDS_TAIL,
+        )
+    )
+
+
+@lru_cache(maxsize=2048)
+def _manus_code(description: str, language: str) -> str:
+    return "".join(
+        (
+            _MANUS_HEAD,
+            description,
+            _LANG_SEP,
+            language,
+            _MANUS_MID,
+            description,
+            _MANUS_TAIL,
+        )
+    )
+
+
+@lru_cache(maxsize=2048)
+def _emergent_code(description: str, language: str) -> str:
+    return "".join(
+        (
+            _EMERGENT_HEAD,
+            description,
+            _LANG_SEP,
+            language,
+            _EMERGENT_MID,
+            description,
+            _EMERGENT_TAIL,
+        )
+    )
+
+
+@lru_cache(maxsize=2048)
+def _openhands_analysis(description: str, language: str) -> str:
+    return (
+        f"OpenHands analysis for '{description}': iterative agent "
+        f"loop with explicit plan/act/observe stages; strong for "
+        f"multi-step {language} tasks."
+    )
+
+
+@lru_cache(maxsize=2048)
+def _manus_analysis(description: str) -> str:
+    return (
+        f"Manus analysis for '{description}': tool-pipeline "
+        f"decomposition; best when the task splits into independent "
+        f"stages."
+    )
+
+
+@lru_cache(maxsize=2048)
+def _emergent_analysis(description: str) -> str:
+    return (
+        f"Emergent analysis for '{description}': conversational "
+        f"scaffold-and-fill; lowest overhead for small focused changes."
+    )
+
+
+@lru_cache(maxsize=2048)
+def _openhands_response(description: str) -> str:
+    return f"OpenHands mode completed the task: {description}"
+
+
+@lru_cache(maxsize=2048)
+def _manus_response(description: str) -> str:
+    return f"Manus mode completed the task: {description}"
+
+
+@lru_cache(maxsize=2048)
+def _emergent_response(description: str) -> str:
+    return f"Emergent mode completed the task: {description}"
+
+
+class _CompletionBatcher:
+    """Coalesces concurrent completion calls into one vLLM request.
+
+    Callers enqueue (prompt, params, future) and a single drain task
+    collects up to ``max_batch`` entries inside a ``window``-second
+    gather window, then posts one /v1/completions request with an array
+    prompt. vLLM schedules the whole array in one engine step, so n
+    concurrent callers cost one HTTP round trip instead of n.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        max_batch: int = 16,
+        window: float = 0.005,
+    ):
+        self._client = client
+        self._queue: "asyncio.Queue" = asyncio.Queue()
+        self._max_batch = max_batch
+        self._window = window
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._drain())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def complete(self, prompt: str, **params) -> str:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, params, future))
+        return await future
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._window
+            while len(batch) < self._max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(
+                        await asyncio.wait_for(self._queue.get(), remaining)
+                    )
+                except asyncio.TimeoutError:
+                    break
+            await self._flush(batch)
+
+    async def _flush(self, batch) -> None:
+        payload = dict(batch[0][1])
+        payload["prompt"] = [prompt for prompt, _, _ in batch]
+        try:
+            response = await self._client.post("/v1/completions", json=payload)
+            response.raise_for_status()
+            choices = response.json().get("choices", [])
+            for (_, _, future), choice in zip(batch, choices):
+                if not future.done():
+                    future.set_result(choice.get("text", ""))
+            for _, _, future in batch[len(choices):]:
+                if not future.done():
+                    future.set_result("")
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+
+
+class UnifiedAgentOrchestrator:
+    """Routes tasks to the configured execution mode and tracks sessions."""
+
+    MAX_SESSIONS = 10_000
+    SESSION_TTL = 3600.0
+    # After a failed completion the vLLM endpoint is left alone for this
+    # long; template renders serve the gap instead of paying a connect
+    # timeout per field on every request while the server is down.
+    VLLM_RETRY_INTERVAL = 30.0
+
+    def __init__(self):
+        # Bounded LRU with TTL expiry: RSS stays flat regardless of
+        # traffic instead of leaking one SessionState per request.
+        self.sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._expiry: Dict[str, float] = {}
+        # Optional Redis tier behind the in-process L1 dict; wired up at
+        # startup when REDIS_URL is set, so sessions survive worker
+        # restarts and are shared across uvicorn workers.
+        self.redis = None
+        self.vllm_endpoint = VLLM_ENDPOINT
+        self.http = _HTTPX
+        # Shared by the mode handlers for real vLLM completions; demo
+        # renders never touch it. Drained by a task started at startup.
+        self.batcher = _CompletionBatcher(_HTTPX)
+        self._vllm_down_until = 0.0
+        self.storage_dir = Path("./sessions")
+        self._dispatch = {
+            ExecutionMode.OPENHANDS: self._execute_openhands_mode,
+            ExecutionMode.MANUS: self._execute_manus_mode,
+            ExecutionMode.EMERGENT: self._execute_emergent_mode,
+            ExecutionMode.HYBRID: self._execute_hybrid_mode,
+        }
+
+    def create_session(self) -> str:
+        session_id = uuid.uuid4().hex
+        self.sessions[session_id] = SessionState(
+            session_id=session_id,
+            created_at=datetime.now().isoformat(),
+        )
+        self._expiry[session_id] = time.monotonic() + self.SESSION_TTL
+        while len(self.sessions) > self.MAX_SESSIONS:
+            evicted, _ = self.sessions.popitem(last=False)
+            self._expiry.pop(evicted, None)
+        return session_id
+
+    def get_session(self, session_id: str) -> Optional[SessionState]:
+        state = self.sessions.get(session_id)
+        if state is None:
+            return None
+        if time.monotonic() >= self._expiry.get(session_id, 0.0):
+            del self.sessions[session_id]
+            self._expiry.pop(session_id, None)
+            return None
+        self.sessions.move_to_end(session_id)
+        return state
+
+    async def ensure_session(self, session_id: Optional[str]) -> str:
+        """Reuse a live caller-supplied session, else mint a new one."""
+        if session_id:
+            if self.get_session(session_id) is not None:
+                return session_id
+            if await self.fetch_session(session_id) is not None:
+                return session_id
+        new_id = self.create_session()
+        await self.persist_session(new_id)
+        return new_id
+
+    async def save_session_to_disk(self, session_id: str) -> None:
+        """Snapshot one session under storage_dir without blocking the loop."""
+        state = self.sessions.get(session_id)
+        if state is None:
+            return
+        payload = _dump_session_bytes(state)
+        target = self.storage_dir / f"{session_id}.json"
+        try:
+            await asyncio.to_thread(target.write_bytes, payload)
+        except OSError as exc:
+            logger.warning("session snapshot failed for %s: %s", session_id, exc)
+
+    async def persist_session(self, session_id: str) -> None:
+        state = self.sessions.get(session_id)
+        if self.redis is None or state is None:
+            return
+        try:
+            await self.redis.set(
+                f"sess:{session_id}",
+                _session_dumps(asdict(state)),
+                ex=int(self.SESSION_TTL),
+            )
+        except Exception as exc:
+            logger.warning("redis persist failed for %s: %s", session_id, exc)
+
+    async def fetch_session(self, session_id: str) -> Optional[SessionState]:
+        """L2 lookup: rehydrate a session from Redis into the L1 dict."""
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(f"sess:{session_id}")
+        except Exception as exc:
+            logger.warning("redis fetch failed for %s: %s", session_id, exc)
+            return None
+        if raw is None:
+            return None
+        payload = _session_loads(raw)
+        state = SessionState(
+            session_id=payload["session_id"],
+            created_at=payload["created_at"],
+            tasks=[TaskContext(**task) for task in payload.get("tasks", ())],
+            status=payload.get("status", "active"),
+        )
+        self.sessions[session_id] = state
+        self._expiry[session_id] = time.monotonic() + self.SESSION_TTL
+        return state
+
+    async def execute_task(self, session_id: str, task: TaskContext) -> Dict[str, Any]:
+        state = self.get_session(session_id)
+        if state is None:
+            state = await self.fetch_session(session_id)
+        if state is None:
+            raise HTTPException(status_code=404, detail="Unknown session")
+        state.tasks.append(task)
+        await self.persist_session(session_id)
+
+        if _PRECOMPUTED:
+            digest = hashlib.blake2b(
+                task.description.encode("utf-8"), digest_size=8
+            ).digest()
+            hit = _PRECOMPUTED.get((task.execution_mode.value, digest))
+            if hit is not None:
+                return hit
+
+        handler = self._dispatch.get(task.execution_mode, self._execute_hybrid_mode)
+        return await handler(task)
+
+    # -- single modes --------------------------------------------------
+
+    async def _complete_or_render(self, prompt: str, render) -> str:
+        """One completion through the shared batcher, or the template.
+
+        All callers use identical sampling params because the batcher
+        applies the first caller's params to the whole array prompt;
+        mixed params in one batch would silently truncate the others.
+        """
+        if time.monotonic() >= self._vllm_down_until:
+            try:
+                text = await self.batcher.complete(
+                    prompt, model=VLLM_MODEL, max_tokens=1024, temperature=0.2
+                )
+            except Exception as exc:
+                self._vllm_down_until = (
+                    time.monotonic() + self.VLLM_RETRY_INTERVAL
+                )
+                logger.debug("vLLM completion failed, using template: %s", exc)
+            else:
+                if text:
+                    return text.strip()
+        return render()
+
+    async def _complete_mode_data(
+        self, persona: str, task: TaskContext, renders
+    ) -> Dict[str, str]:
+        """Produce the code/analysis/response trio for one mode.
+
+        Each field goes through the completion batcher when vLLM is up,
+        so the three completions here (nine in hybrid mode) coalesce
+        into one array-prompt request. The memoized template renders
+        stay as the fallback while the endpoint is down.
+        """
+        render_code, render_analysis, render_response = renders
+        language = task.language or "python"
+        code, analysis, response = await asyncio.gather(
+            self._complete_or_render(
+                f"You are {persona}. Write {language} code for this task:"
+                f"\n\n{task.description}\n",
+                lambda: render_code(task),
+            ),
+            self._complete_or_render(
+                f"You are {persona}. Analyze this task and outline an "
+                f"implementation approach:\n\n{task.description}\n",
+                lambda: render_analysis(task),
+            ),
+            self._complete_or_render(
+                f"You are {persona}. Summarize in two sentences how you "
+                f"would handle this task:\n\n{task.description}\n",
+                lambda: render_response(task),
+            ),
+        )
+        return {"code": code, "analysis": analysis, "response": response}
+
+    async def _execute_openhands_mode(self, task: TaskContext) -> Dict[str, Any]:
+        data = await self._complete_mode_data(
+            "the OpenHands coding agent",
+            task,
+            (
+                self._generate_openhands_code,
+                self._generate_openhands_analysis,
+                self._generate_openhands_response,
+            ),
+        )
+        return {"success": True, "mode": "openhands", "data": data}
+
+    async def _execute_manus_mode(self, task: TaskContext) -> Dict[str, Any]:
+        data = await self._complete_mode_data(
+            "the Manus planning agent",
+            task,
+            (
+                self._generate_manus_code,
+                self._generate_manus_analysis,
+                self._generate_manus_response,
+            ),
+        )
+        return {"success": True, "mode": "manus", "data": data}
+
+    async def _execute_emergent_mode(self, task: TaskContext) -> Dict[str, Any]:
+        data = await self._complete_mode_data(
+            "the Emergent solutions agent",
+            task,
+            (
+                self._generate_emergent_code,
+                self._generate_emergent_analysis,
+                self._generate_emergent_response,
+            ),
+        )
+        return {"success": True, "mode": "emergent", "data": data}
+
+    # -- hybrid --------------------------------------------------------
+
+    async def _execute_hybrid_mode(self, task: TaskContext) -> Dict[str, Any]:
+        # Concurrent sub-modes batch their vLLM I/O through the shared
+        # coalescer, so wall-clock is one engine step rather than the
+        # sum of all three modes.
+        openhands_result, manus_result, emergent_result = await asyncio.gather(
+            self._execute_openhands_mode(task),
+            self._execute_manus_mode(task),
+            self._execute_emergent_mode(task),
+        )
+        return {
+            "success": True,
+            "mode": "hybrid",
+            "data": {
+                "code": self._combine_code_results(
+                    openhands_result, manus_result, emergent_result
+                ),
+                "analysis": self._combine_analysis_results(
+                    openhands_result, manus_result, emergent_result
+                ),
+                "response": self._combine_response_results(
+                    openhands_result, manus_result, emergent_result
+                ),
+            },
+        }
+
+    def _combine_code_results(self, openhands, manus, emergent) -> str:
+        oh = openhands.get("data") or {}
+        ma = manus.get("data") or {}
+        em = emergent.get("data") or {}
+        return "\n\n".join(
+            (
+                "# === OpenHands variant ===",
+                oh.get("code", ""),
+                "# === Manus variant ===",
+                ma.get("code", ""),
+                "# === Emergent variant ===",
+                em.get("code", ""),
+            )
+        )
+
+    def _combine_analysis_results(self, openhands, manus, emergent) -> str:
+        oh = openhands.get("data") or {}
+        ma = manus.get("data") or {}
+        em = emergent.get("data") or {}
+        return "\n".join(
+            (
+                oh.get("analysis", ""),
+                ma.get("analysis", ""),
+                em.get("analysis", ""),
+            )
+        )
+
+    def _combine_response_results(self, openhands, manus, emergent) -> str:
+        oh = openhands.get("data") or {}
+        ma = manus.get("data") or {}
+        em = emergent.get("data") or {}
+        return "\n".join(
+            (
+                oh.get("response", ""),
+                ma.get("response", ""),
+                em.get("response", ""),
+            )
+        )
+
+    # -- template renderers --------------------------------------------
+    # Pure functions of (description, language); rendered strings are
+    # memoized at module level (see _openhands_code and friends) so
+    # repeated prompts cost a dict lookup. Memory ceiling is
+    # maxsize x ~2KB per entry, about 4MB per renderer cache.
+
+    def _generate_openhands_code(self, task: TaskContext) -> str:
+        return _openhands_code(task.description, task.language or "python")
+
+    def _generate_manus_code(self, task: TaskContext) -> str:
+        return _manus_code(task.description, task.language or "python")
+
+    def _generate_emergent_code(self, task: TaskContext) -> str:
+        return _emergent_code(task.description, task.language or "python")
+
+    def _generate_openhands_analysis(self, task: TaskContext) -> str:
+        return _openhands_analysis(task.description, task.language or "python")
+
+    def _generate_manus_analysis(self, task: TaskContext) -> str:
+        return _manus_analysis(task.description)
+
+    def _generate_emergent_analysis(self, task: TaskContext) -> str:
+        return _emergent_analysis(task.description)
+
+    def _generate_openhands_response(self, task: TaskContext) -> str:
+        return _openhands_response(task.description)
+
+    def _generate_manus_response(self, task: TaskContext) -> str:
+        return _manus_response(task.description)
+
+    def _generate_emergent_response(self, task: TaskContext) -> str:
+        return _emergent_response(task.description)
+
+
+orchestrator = UnifiedAgentOrchestrator()
+
+app = FastAPI(
+    title="Zero Cost Code Agent - Enhanced Production Server",
+    version="3.0.0",
+    default_response_class=_DefaultResponse,
+)
+
+@app.on_event("startup")
+async def _connect_redis():
+    if aioredis is not None and REDIS_URL:
+        orchestrator.redis = aioredis.from_url(REDIS_URL)
+        logger.info("session store backed by redis at %s", REDIS_URL)
+
+
+@app.on_event("startup")
+async def _start_batcher():
+    orchestrator.batcher.start()
+
+
+@app.on_event("shutdown")
+async def _stop_batcher():
+    await orchestrator.batcher.stop()
+
+
+@app.on_event("shutdown")
+async def _snapshot_sessions():
+    orchestrator.storage_dir.mkdir(parents=True, exist_ok=True)
+    await asyncio.gather(
+        *(
+            orchestrator.save_session_to_disk(session_id)
+            for session_id in list(orchestrator.sessions)
+        )
+    )
+
+
+@app.on_event("shutdown")
+async def _close_redis():
+    if orchestrator.redis is not None:
+        await orchestrator.redis.aclose()
+        orchestrator.redis = None
+
+
+@app.on_event("shutdown")
+async def _close_http_client():
+    await _HTTPX.aclose()
+
+
+# Explicit origins let browsers cache the preflight verdict for a day
+# (max_age) instead of re-issuing OPTIONS before every POST; override
+# with a comma-separated CORS_ORIGINS for other deployments.
+_CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.environ.get(
+        "CORS_ORIGINS", "http://localhost:12000,http://127.0.0.1:12000"
+    ).split(",")
+    if origin.strip()
+]
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=_CORS_ORIGINS,
+    allow_credentials=True,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
+)
+
+# Hybrid responses carry three code variants and compress well; level 5
+# is close to level 9's ratio at a fraction of the CPU. Small payloads
+# skip compression entirely.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+_FALLBACK_HTML = """<!DOCTYPE html>
+<html><head><title>Zero Cost Code Agent</title></head>
+<body><h1>Zero Cost Code Agent</h1>
+<p>Enhanced production server is running. Frontend assets not found;
+use the /api/v3 endpoints directly.</p></body></html>
+"""
+
+# Resolve the frontend exactly once at import; GET / then returns
+# pre-read bytes with no per-request stat/open/read.
+frontend_path = None
+for candidate in ("frontend-professional", "frontend", "static"):
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), candidate)
+    if os.path.exists(path):
+        frontend_path = path
+        break
+
+try:
+    _INDEX_HTML = Path(frontend_path, "index.html").read_bytes() if frontend_path else None
+except OSError:
+    _INDEX_HTML = None
+if _INDEX_HTML is None:
+    _INDEX_HTML = _FALLBACK_HTML.encode("utf-8")
+
+# Serve assets straight through FileResponse instead of a StaticFiles
+# sub-app: no mount-routing hop per request, and the body goes out via
+# the server's zero-copy file send when available. Long-lived cache
+# headers keep repeat visits off the wire entirely.
+if frontend_path:
+    _STATIC_ROOT = Path(frontend_path).resolve()
+
+    @app.get("/static/{asset_path:path}")
+    async def serve_static(asset_path: str):
+        target = (_STATIC_ROOT / asset_path).resolve()
+        if not target.is_relative_to(_STATIC_ROOT) or not target.is_file():
+            raise HTTPException(status_code=404, detail="Not found")
+        return FileResponse(
+            target, headers={"Cache-Control": "public, max-age=3600"}
+        )
+
+
+@app.get("/")
+async def serve_frontend():
+    return HTMLResponse(content=_INDEX_HTML)
+
+
+# Everything in the status payload except the timestamp is fixed at
+# import time; the handler patches a shallow copy instead of rebuilding
+# the nested dict on every poll.
+_STATUS_TEMPLATE = {
+    "service": "zerocostxcode-enhanced",
+    "version": "3.0.0",
+    "demo_mode": True,
+    "execution_modes": [mode.value for mode in ExecutionMode],
+    "features": {
+        "code_generation": True,
+        "code_analysis": True,
+        "chat": True,
+        "vibe_coding": True,
+        "sessions": True,
+    },
+    "vllm_endpoint": orchestrator.vllm_endpoint,
+}
+
+
+@app.get("/api/v3/status")
+async def get_enhanced_status():
+    payload = _STATUS_TEMPLATE.copy()
+    payload["timestamp"] = datetime.now().isoformat()
+    return payload
+
+
+@app.get("/api/v2/status")
+async def get_legacy_status():
+    return await get_enhanced_status()
+
+
+@app.post("/api/v3/generate-code")
+async def generate_code_unified(request: CodeGenerationRequest):
+    session_id = await orchestrator.ensure_session(request.session_id)
+    task = TaskContext(
+        task_id=_new_task_id(),
+        description=request.description,
+        language=request.language,
+        execution_mode=_MODE_FROM_STR.get(request.execution_mode, ExecutionMode.HYBRID),
+        created_at=datetime.now().isoformat(),
+    )
+    result = await orchestrator.execute_task(session_id, task)
+    return {"session_id": session_id, "task_id": task.task_id, **result}
+
+
+@app.post("/api/v3/analyze-code")
+async def analyze_code_unified(request: CodeAnalysisRequest):
+    session_id = await orchestrator.ensure_session(request.session_id)
+    task = TaskContext(
+        task_id=_new_task_id(),
+        description="Analyze code: " + request.code[:100] + "...",
+        execution_mode=_MODE_FROM_STR.get(request.execution_mode, ExecutionMode.HYBRID),
+        created_at=datetime.now().isoformat(),
+    )
+    result = await orchestrator.execute_task(session_id, task)
+    payload = {"session_id": session_id, "task_id": task.task_id, **result}
+    if token_stats is not None:
+        payload["metrics"] = token_stats(request.code)
+    return payload
+
+
+@app.post("/api/v3/chat")
+async def chat_unified(request: ChatRequest):
+    session_id = await orchestrator.ensure_session(request.session_id)
+    task = TaskContext(
+        task_id=_new_task_id(),
+        description=request.message,
+        execution_mode=_MODE_FROM_STR.get(request.execution_mode, ExecutionMode.HYBRID),
+        created_at=datetime.now().isoformat(),
+    )
+    result = await orchestrator.execute_task(session_id, task)
+    return {"session_id": session_id, "task_id": task.task_id, **result}
+
+
+@app.post("/api/v3/vibe-code")
+async def vibe_code_app(request: VibeCodingRequest):
+    session_id = orchestrator.create_session()
+    task = TaskContext(
+        task_id=_new_task_id(),
+        description=f"Build a {request.app_type} app: {request.description}",
+        execution_mode=ExecutionMode.HYBRID,
+        created_at=datetime.now().isoformat(),
+    )
+    result = await orchestrator.execute_task(session_id, task)
+    return {"session_id": session_id, "task_id": task.task_id, **result}
+
+
+@app.get("/api/v3/sessions")
+async def list_sessions():
+    return {"sessions": list(orchestrator.sessions.keys())}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    try:
+        import uvloop  # noqa: F401
+        loop_impl, http_impl = "uvloop", "httptools"
+    except ImportError:
+        loop_impl, http_impl = "asyncio", "auto"
+
+    uvicorn.run(
+        "enhanced_production_server:app",
+        host="0.0.0.0",
+        port=12000,
+        loop=loop_impl,
+        http=http_impl,
+        workers=os.cpu_count(),
+        log_level="warning",
+    )
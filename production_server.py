@@ -0,0 +1,1124 @@
+"""Production server for zero-cost local AI coding.
+
+FastAPI application fronting a locally managed vLLM instance
+(DeepSeek coder models). When no vLLM server is reachable the
+endpoints fall back to canned demonstration responses so the UI stays
+usable on machines without a GPU.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import shlex
+import string
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+import httpx
+import uvicorn
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, constr
+
+try:
+    import orjson  # noqa: F401
+
+    from fastapi.responses import ORJSONResponse as _DefaultResponse
+except ImportError:
+    orjson = None
+    _DefaultResponse = JSONResponse
+
+try:
+    import msgspec
+
+    class _CompletionChoice(msgspec.Struct):
+        index: int = 0
+        text: str = ""
+
+    class _Completion(msgspec.Struct):
+        choices: List[_CompletionChoice] = []
+
+    _COMPLETION_DECODER = msgspec.json.Decoder(_Completion)
+except ImportError:
+    msgspec = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+try:
+    import faiss
+    import numpy  # noqa: F401 - faiss returns numpy arrays
+except ImportError:
+    faiss = None
+
+try:
+    from vllm import AsyncEngineArgs, AsyncLLMEngine, SamplingParams
+except ImportError:
+    AsyncLLMEngine = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# One multiline pass by the C regex engine instead of splitting the
+# response into per-line str objects and filtering in Python.
+_SUGGESTION_RE = re.compile(r"^[ \t]*[-•][ \t]+(.+?)[ \t]*$", re.MULTILINE)
+
+_THINK_RE = re.compile(r"<think>(.*?)</think>", re.DOTALL)
+
+# Prompt lookup tables, built once and read-only; the per-call dict
+# literals they replace were reconstructed on every request.
+_COMPLEXITY_INSTR = MappingProxyType({
+    "simple": "Write straightforward, beginner-friendly code with clear comments.",
+    "intermediate": "Write clean, idiomatic code following best practices.",
+    "advanced": "Write optimized, production-grade code with robust error handling.",
+})
+
+_ANALYSIS_FOCUS = MappingProxyType({
+    "general": "overall code quality, readability and structure",
+    "performance": "algorithmic complexity, allocations and hot-path costs",
+    "security": "input validation, injection risks and unsafe patterns",
+    "style": "naming, formatting and idiomatic usage",
+})
+
+
+@lru_cache(maxsize=2048)
+def _render_codegen_prompt(
+    prompt: str, language: str, complexity: str, include_tests: bool
+) -> str:
+    instructions = _COMPLEXITY_INSTR.get(complexity, _COMPLEXITY_INSTR["intermediate"])
+    test_clause = (
+        "\n- Include unit tests covering the main paths." if include_tests else ""
+    )
+    return f"""<think>
+The user wants {language} code. I should reason about the requirements,
+sketch the approach, then produce the final implementation.
+</think>
+
+You are an expert {language} developer.
+
+Task: {prompt}
+
+Requirements:
+- {instructions}
+- Use clear naming and add docstrings where helpful.
+- Handle edge cases and errors appropriately.{test_clause}
+
+Return the final code in a single fenced code block."""
+
+
+@lru_cache(maxsize=512)
+def _render_analysis_prompt(code: str, language: str, analysis_type: str) -> str:
+    focus = _ANALYSIS_FOCUS.get(analysis_type, _ANALYSIS_FOCUS["general"])
+    return f"""<think>
+I should review this {language} code focusing on {focus}, then give
+actionable suggestions.
+</think>
+
+You are an expert {language} reviewer. Analyze the following code with
+a focus on {focus}.
+
+```{language}
+{code}
+```
+
+Provide a short assessment followed by a bulleted list of concrete
+improvement suggestions."""
+
+
+@lru_cache(maxsize=2048)
+def _render_chat_prompt(message: str, context: str) -> str:
+    context_block = f"\nContext:\n{context}\n" if context else ""
+    return f"""<think>
+The user is asking a coding question. I should answer concisely with
+examples where useful.
+</think>
+
+You are a helpful senior software engineer.{context_block}
+User: {message}"""
+
+
+# Demo payload templates, parsed once at import; substitute() fills
+# the single ${prompt} slot in one C-level pass instead of re-running
+# multi-KB f-string interpolation per demo request (the default path).
+_DEMO_CODE_TMPLS = {
+    "python": string.Template('''"""Generated for: ${prompt}"""
+
+
+def solve():
+    """Demo implementation produced without a model.
+
+    Replace with a real generation by starting the vLLM server.
+    """
+    result = []
+    for i in range(10):
+        result.append(i * i)
+    return result
+
+
+if __name__ == "__main__":
+    print(solve())
+'''),
+    "javascript": string.Template('''// Generated for: ${prompt}
+
+function solve() {
+  // Demo implementation produced without a model.
+  const result = [];
+  for (let i = 0; i < 10; i++) {
+    result.push(i * i);
+  }
+  return result;
+}
+
+console.log(solve());
+'''),
+    "java": string.Template('''// Generated for: ${prompt}
+
+public class Solution {
+    // Demo implementation produced without a model.
+    public static int[] solve() {
+        int[] result = new int[10];
+        for (int i = 0; i < 10; i++) {
+            result[i] = i * i;
+        }
+        return result;
+    }
+}
+'''),
+}
+
+_DEMO_ANALYSES = MappingProxyType({
+    "general": """Overall the code is readable and reasonably structured.
+
+- Consider extracting the main loop into a named helper
+- Add docstrings to the public functions
+- Prefer early returns over nested conditionals
+- Add type annotations for the public API""",
+    "performance": """The hot path allocates more than it needs to.
+
+- Hoist invariant lookups out of the loop
+- Use a comprehension instead of repeated append
+- Cache repeated pure-function calls
+- Profile before optimizing further""",
+    "security": """No critical issues found in this sample.
+
+- Validate all external inputs at the boundary
+- Avoid string-building SQL or shell commands
+- Pin dependency versions in requirements
+- Keep secrets out of source control""",
+})
+
+
+# Static portion of every demo response, built once; handlers merge in
+# the per-call fields on top.
+_DEMO_META = MappingProxyType({
+    "success": True,
+    "model": "demo-mode-vllm-ready",
+    "mode": "demonstration",
+})
+
+
+@lru_cache(maxsize=256)
+def _demo_code(prompt: str, language: str) -> str:
+    template = _DEMO_CODE_TMPLS.get(language.lower(), _DEMO_CODE_TMPLS["python"])
+    return template.substitute(prompt=prompt)
+
+
+# Length caps match the enhanced server: the prompt renderers and demo
+# templates are lru_cached on the raw text, so without a bound a burst
+# of megabyte payloads would pin cache-size x payload bytes in RSS.
+class CodeGenerationRequest(BaseModel):
+    prompt: constr(min_length=1, max_length=50_000)
+    language: str = "python"
+    complexity: str = "intermediate"
+    include_tests: bool = False
+    temperature: float = 0.1
+    max_tokens: int = 4096
+
+
+class CodeAnalysisRequest(BaseModel):
+    code: constr(min_length=1, max_length=200_000)
+    language: str = "python"
+    analysis_type: str = "general"
+
+
+class ChatRequest(BaseModel):
+    message: constr(min_length=1, max_length=50_000)
+    context: str = ""
+
+
+class _TwoTierCache:
+    """Exact-match LRU plus optional semantic similarity cache.
+
+    The exact tier is an OrderedDict keyed by a BLAKE2b digest of the
+    prompt and sampling params. The semantic tier embeds prompts with
+    MiniLM into a flat inner-product faiss index; a normalized-cosine
+    neighbour at or above the threshold counts as a hit. Either tier
+    degrades away cleanly when its optional dependency is missing.
+    """
+
+    SEMANTIC_THRESHOLD = 0.92
+
+    def __init__(self, maxsize: int = 1024, semantic_size: int = 4096):
+        self._maxsize = maxsize
+        self._semantic_size = semantic_size
+        self._exact: "OrderedDict[Any, Dict[str, Any]]" = OrderedDict()
+        self._model = None
+        self._index = None
+        self._values: list = []
+
+    @staticmethod
+    def key(*parts):
+        """Non-cryptographic cache key over prompt and params.
+
+        xxh3 when available (>10 GB/s, and the 64-bit intdigest makes
+        a dict-friendly key with no digest allocation at all);
+        BLAKE2b-128 otherwise — both far faster than SHA256 on the
+        multi-KB prompts being hashed.
+        """
+        if xxhash is not None:
+            digest = xxhash.xxh3_64()
+            for part in parts:
+                digest.update(str(part).encode("utf-8"))
+            return digest.intdigest()
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+        return digest.digest()
+
+    def _embed(self, prompt: str):
+        if SentenceTransformer is None or faiss is None:
+            return None
+        if self._model is None:
+            self._model = SentenceTransformer(
+                "sentence-transformers/all-MiniLM-L6-v2"
+            )
+        return self._model.encode(
+            [prompt], normalize_embeddings=True
+        ).astype("float32")
+
+    def get(self, key: bytes, prompt: str):
+        """Return ``(value, "HIT"|"SEMANTIC")`` or ``(None, "MISS")``."""
+        hit = self._exact.get(key)
+        if hit is not None:
+            self._exact.move_to_end(key)
+            return hit, "HIT"
+        if self._index is not None and self._values:
+            vec = self._embed(prompt)
+            if vec is not None:
+                scores, ids = self._index.search(vec, 1)
+                if ids[0][0] >= 0 and scores[0][0] >= self.SEMANTIC_THRESHOLD:
+                    return self._values[ids[0][0]], "SEMANTIC"
+        return None, "MISS"
+
+    def put(self, key: bytes, prompt: str, value: Dict[str, Any]) -> None:
+        self._exact[key] = value
+        while len(self._exact) > self._maxsize:
+            self._exact.popitem(last=False)
+        vec = self._embed(prompt)
+        if vec is None:
+            return
+        if self._index is None:
+            self._index = faiss.IndexFlatIP(vec.shape[1])
+        if len(self._values) >= self._semantic_size:
+            # Generational flip: resetting the flat index is far
+            # cheaper than per-row deletion and keeps it bounded.
+            self._index.reset()
+            self._values.clear()
+        self._index.add(vec)
+        self._values.append(value)
+
+
+class _Batcher:
+    """Coalesces concurrent vLLM calls into array-prompt requests.
+
+    vLLM's /v1/completions accepts a list of prompts and feeds them to
+    the same continuous-batching step, so calls arriving within the
+    gather window share one HTTP round-trip and keep the GPU batch
+    full. Entries are grouped by (temperature, max_tokens) so each
+    request keeps its own sampling params; a solo caller with an idle
+    queue takes a fast path and skips the window entirely.
+    """
+
+    def __init__(self, integration, max_wait: float = 0.008, max_batch: int = 32):
+        self._integration = integration
+        self._max_wait = max_wait
+        self._max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._solo_inflight = False
+
+    async def submit(self, prompt: str, temperature: float, max_tokens: int) -> str:
+        if self._queue.empty() and not self._solo_inflight:
+            self._solo_inflight = True
+            try:
+                texts = await self._post([prompt], temperature, max_tokens)
+                return texts[0] if texts else ""
+            finally:
+                self._solo_inflight = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, temperature, max_tokens, future))
+        return await future
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            groups: Dict[tuple, list] = {}
+            for prompt, temperature, max_tokens, future in batch:
+                groups.setdefault((temperature, max_tokens), []).append(
+                    (prompt, future)
+                )
+            for (temperature, max_tokens), entries in groups.items():
+                try:
+                    texts = await self._post(
+                        [prompt for prompt, _ in entries], temperature, max_tokens
+                    )
+                except Exception as exc:
+                    for _, future in entries:
+                        if not future.done():
+                            future.set_exception(exc)
+                    continue
+                for (_, future), text in zip(entries, texts):
+                    if not future.done():
+                        future.set_result(text)
+                for _, future in entries[len(texts):]:
+                    if not future.done():
+                        future.set_result("")
+
+    async def _post(
+        self, prompts: list, temperature: float, max_tokens: int
+    ) -> list:
+        payload = {
+            "model": self._integration.model_name,
+            "prompt": prompts,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        client = await self._integration._ensure_client()
+        response = await client.post("/v1/completions", json=payload)
+        response.raise_for_status()
+        if msgspec is not None:
+            # Typed decode straight off the response bytes: no
+            # intermediate dicts, direct field access.
+            completion = _COMPLETION_DECODER.decode(response.content)
+            choices = sorted(completion.choices, key=lambda c: c.index)
+            return [choice.text for choice in choices]
+        choices = sorted(
+            response.json().get("choices", []), key=lambda c: c.get("index", 0)
+        )
+        return [choice.get("text", "") for choice in choices]
+
+
+class ProductionvLLMIntegration:
+    """Talks to the local vLLM OpenAI-compatible endpoint."""
+
+    # How long a health probe verdict is reused before re-probing.
+    HEALTH_TTL = 5.0
+
+    def __init__(
+        self,
+        vllm_endpoint: str = "http://localhost:8000",
+        model_name: str = "deepseek-ai/deepseek-coder-6.7b-instruct",
+    ):
+        self.vllm_endpoint = vllm_endpoint.rstrip("/")
+        self.model_name = model_name
+        self.response_cache = _TwoTierCache()
+        self.client_config = {"headers": {"Content-Type": "application/json"}}
+        self.vllm_available = False
+        self._health_cache = (0.0, False)
+        self._batcher = _Batcher(self)
+        self._engine = None
+        self._engine_failed = False
+        # Demo responses are instant by default; set a positive value
+        # to opt back into simulated generation latency.
+        self.demo_latency = 0.0
+        # One pooled async client shared by every request; created
+        # lazily so construction stays sync and the pool binds to the
+        # running event loop.
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def _ensure_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.vllm_endpoint,
+                timeout=httpx.Timeout(60.0),
+                headers=self.client_config["headers"],
+                limits=httpx.Limits(max_connections=256, max_keepalive_connections=64),
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+
+    async def check_vllm_server(self) -> bool:
+        """Probe /health; verdicts are reused for HEALTH_TTL seconds
+        so bursts of requests share one round-trip."""
+        if self._ensure_engine() is not None:
+            # The in-process engine needs no HTTP server to be up.
+            self.vllm_available = True
+            return True
+        now = time.monotonic()
+        checked_at, healthy = self._health_cache
+        if now - checked_at < self.HEALTH_TTL:
+            self.vllm_available = healthy
+            return healthy
+        client = await self._ensure_client()
+        try:
+            response = await client.get("/health", timeout=2.0)
+            healthy = response.status_code == 200
+        except httpx.HTTPError:
+            healthy = False
+        self._health_cache = (now, healthy)
+        self.vllm_available = healthy
+        return healthy
+
+    def _ensure_engine(self):
+        """In-process AsyncLLMEngine, built on first use.
+
+        When the vllm package is importable in this process, calling
+        the engine directly skips one HTTP hop and two JSON passes per
+        generation. Returns None when vllm is absent or engine
+        construction failed, in which case the HTTP path is used.
+        """
+        if AsyncLLMEngine is None or self._engine_failed:
+            return None
+        if self._engine is None:
+            try:
+                self._engine = AsyncLLMEngine.from_engine_args(
+                    AsyncEngineArgs(
+                        model=self.model_name, enable_prefix_caching=True
+                    )
+                )
+            except Exception as exc:
+                logger.warning("in-process vLLM engine unavailable: %s", exc)
+                self._engine_failed = True
+                return None
+        return self._engine
+
+    async def _engine_generate(
+        self, engine, prompt: str, temperature: float, max_tokens: int
+    ) -> str:
+        params = SamplingParams(
+            temperature=temperature, top_p=0.9, max_tokens=max_tokens
+        )
+        final = None
+        async for output in engine.generate(prompt, params, uuid4().hex):
+            final = output
+        return final.outputs[0].text if final is not None and final.outputs else ""
+
+    async def _call_vllm_api(
+        self, prompt: str, temperature: float = 0.1, max_tokens: int = 4096
+    ) -> str:
+        engine = self._ensure_engine()
+        if engine is not None:
+            return await self._engine_generate(engine, prompt, temperature, max_tokens)
+        return await self._batcher.submit(prompt, temperature, max_tokens)
+
+    async def _stream_vllm_api(
+        self, prompt: str, temperature: float, max_tokens: int
+    ):
+        """Yield delta tokens from a stream=True chat completion.
+
+        SSE frames are split at the bytes level; tokens surface as soon
+        as vLLM emits them instead of after the full generation.
+        """
+        payload = {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        }
+        client = await self._ensure_client()
+        async with client.stream(
+            "POST", "/v1/chat/completions", json=payload
+        ) as response:
+            response.raise_for_status()
+            buf = bytearray()
+            async for chunk in response.aiter_bytes():
+                buf += chunk
+                while (newline := buf.find(b"\n")) >= 0:
+                    line = bytes(buf[:newline])
+                    del buf[: newline + 1]
+                    if line.endswith(b"\r"):
+                        line = line[:-1]
+                    if not line.startswith(b"data: "):
+                        continue
+                    data = line[6:]
+                    if data == b"[DONE]":
+                        return
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    token = delta.get("content")
+                    if token:
+                        yield token
+
+    async def stream_generated_code(self, request: CodeGenerationRequest):
+        """Streaming variant of generate_code.
+
+        Tokens go out as produced; the accumulated text is parsed and
+        stored on completion so the response cache still fills up.
+        """
+        full_prompt = self._build_code_generation_prompt(
+            request.prompt, request.language, request.complexity, request.include_tests
+        )
+        cache_key = _TwoTierCache.key(
+            self.model_name, full_prompt, request.temperature, request.max_tokens
+        )
+        cached, _ = self.response_cache.get(cache_key, full_prompt)
+        if cached is not None:
+            yield cached.get("code", "")
+            return
+        if not await self.check_vllm_server():
+            demo = await self._generate_demo_code_response(request)
+            yield demo["code"]
+            return
+        parts: list = []
+        try:
+            async for token in self._stream_vllm_api(
+                full_prompt, request.temperature, request.max_tokens
+            ):
+                parts.append(token)
+                yield token
+        except httpx.HTTPError as exc:
+            logger.warning("vLLM streaming generation failed: %s", exc)
+            self._health_cache = (0.0, False)
+            return
+        response = "".join(parts)
+        self.response_cache.put(
+            cache_key,
+            full_prompt,
+            {
+                "success": True,
+                "code": self._extract_code_block(response),
+                "thinking": self._extract_thinking_block(response),
+                "language": request.language,
+                "model": self.model_name,
+                "mode": "production",
+                "timestamp": datetime.now().isoformat(),
+            },
+        )
+
+    async def stream_chat(self, request: ChatRequest):
+        """Streaming variant of chat_response; same cache behavior as
+        stream_generated_code."""
+        full_prompt = self._build_chat_prompt(request.message, request.context)
+        cache_key = _TwoTierCache.key(self.model_name, full_prompt, 0.3, 2048)
+        cached, _ = self.response_cache.get(cache_key, full_prompt)
+        if cached is not None:
+            yield cached.get("response", "")
+            return
+        if not await self.check_vllm_server():
+            demo = await self._generate_demo_chat_response(request)
+            yield demo["response"]
+            return
+        parts: list = []
+        try:
+            async for token in self._stream_vllm_api(full_prompt, 0.3, 2048):
+                parts.append(token)
+                yield token
+        except httpx.HTTPError as exc:
+            logger.warning("vLLM streaming chat failed: %s", exc)
+            self._health_cache = (0.0, False)
+            return
+        self.response_cache.put(
+            cache_key,
+            full_prompt,
+            {
+                "success": True,
+                "response": "".join(parts),
+                "model": self.model_name,
+                "mode": "production",
+                "timestamp": datetime.now().isoformat(),
+            },
+        )
+
+    async def generate_code(self, request: CodeGenerationRequest) -> Dict[str, Any]:
+        full_prompt = self._build_code_generation_prompt(
+            request.prompt, request.language, request.complexity, request.include_tests
+        )
+        cache_key = _TwoTierCache.key(
+            self.model_name, full_prompt, request.temperature, request.max_tokens
+        )
+        cached, cache_status = self.response_cache.get(cache_key, full_prompt)
+        if cached is not None:
+            return {**cached, "x_cache": cache_status}
+        if await self.check_vllm_server():
+            try:
+                response = await self._call_vllm_api(
+                    full_prompt, request.temperature, request.max_tokens
+                )
+                result = {
+                    "success": True,
+                    "code": self._extract_code_block(response),
+                    "thinking": self._extract_thinking_block(response),
+                    "language": request.language,
+                    "model": self.model_name,
+                    "mode": "production",
+                    "timestamp": datetime.now().isoformat(),
+                }
+                self.response_cache.put(cache_key, full_prompt, result)
+                return {**result, "x_cache": "MISS"}
+            except httpx.HTTPError as exc:
+                logger.warning("vLLM generation failed, using demo mode: %s", exc)
+                self._health_cache = (0.0, False)
+        return await self._generate_demo_code_response(request)
+
+    async def analyze_code(self, request: CodeAnalysisRequest) -> Dict[str, Any]:
+        full_prompt = self._build_code_analysis_prompt(
+            request.code, request.language, request.analysis_type
+        )
+        cache_key = _TwoTierCache.key(self.model_name, full_prompt, 0.1)
+        cached, cache_status = self.response_cache.get(cache_key, full_prompt)
+        if cached is not None:
+            return {**cached, "x_cache": cache_status}
+        if await self.check_vllm_server():
+            try:
+                response = await self._call_vllm_api(full_prompt, temperature=0.1)
+                result = {
+                    "success": True,
+                    "analysis": response,
+                    "suggestions": self._extract_suggestions(response),
+                    "language": request.language,
+                    "model": self.model_name,
+                    "mode": "production",
+                    "timestamp": datetime.now().isoformat(),
+                }
+                self.response_cache.put(cache_key, full_prompt, result)
+                return {**result, "x_cache": "MISS"}
+            except httpx.HTTPError as exc:
+                logger.warning("vLLM analysis failed, using demo mode: %s", exc)
+                self._health_cache = (0.0, False)
+        return await self._generate_demo_analysis_response(request)
+
+    async def chat_response(self, request: ChatRequest) -> Dict[str, Any]:
+        full_prompt = self._build_chat_prompt(request.message, request.context)
+        cache_key = _TwoTierCache.key(self.model_name, full_prompt, 0.3, 2048)
+        cached, cache_status = self.response_cache.get(cache_key, full_prompt)
+        if cached is not None:
+            return {**cached, "x_cache": cache_status}
+        if await self.check_vllm_server():
+            try:
+                response = await self._call_vllm_api(
+                    full_prompt, temperature=0.3, max_tokens=2048
+                )
+                result = {
+                    "success": True,
+                    "response": response,
+                    "model": self.model_name,
+                    "mode": "production",
+                    "timestamp": datetime.now().isoformat(),
+                }
+                self.response_cache.put(cache_key, full_prompt, result)
+                return {**result, "x_cache": "MISS"}
+            except httpx.HTTPError as exc:
+                logger.warning("vLLM chat failed, using demo mode: %s", exc)
+                self._health_cache = (0.0, False)
+        return await self._generate_demo_chat_response(request)
+
+    # Prompt rendering is memoized at module level; common in UI
+    # "retry" flows where the same inputs arrive repeatedly.
+    def _build_code_generation_prompt(
+        self, prompt: str, language: str, complexity: str, include_tests: bool
+    ) -> str:
+        return _render_codegen_prompt(prompt, language, complexity, include_tests)
+
+    def _build_code_analysis_prompt(
+        self, code: str, language: str, analysis_type: str
+    ) -> str:
+        return _render_analysis_prompt(code, language, analysis_type)
+
+    def _build_chat_prompt(self, message: str, context: str) -> str:
+        return _render_chat_prompt(message, context)
+
+    def _extract_thinking_block(self, response: str) -> str:
+        match = _THINK_RE.search(response)
+        return match.group(1).strip() if match else ""
+
+    def _extract_code_block(self, response: str) -> str:
+        # partition stops at the first fence: no O(N) list of every
+        # segment just to pick out element one.
+        _, sep, rest = response.partition("```")
+        if not sep:
+            return response.strip()
+        code, sep, _ = rest.partition("```")
+        if not sep:
+            return response.strip()
+        # Drop a leading language tag line like ```python
+        tag, newline, body = code.partition("\n")
+        if newline and " " not in tag.strip():
+            code = body
+        return code.strip()
+
+    def _extract_suggestions(self, response: str) -> list:
+        return _SUGGESTION_RE.findall(response)[:5]
+
+    async def _generate_demo_code_response(
+        self, request: CodeGenerationRequest
+    ) -> Dict[str, Any]:
+        if self.demo_latency:
+            await asyncio.sleep(self.demo_latency)
+        return {
+            **_DEMO_META,
+            "code": self._get_demo_code_by_language(request.prompt, request.language),
+            "thinking": "Demo mode: returning a representative sample.",
+            "language": request.language,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    async def _generate_demo_analysis_response(
+        self, request: CodeAnalysisRequest
+    ) -> Dict[str, Any]:
+        if self.demo_latency:
+            await asyncio.sleep(self.demo_latency)
+        analysis = self._get_demo_analysis_by_type(request.analysis_type)
+        return {
+            **_DEMO_META,
+            "analysis": analysis,
+            "suggestions": self._extract_suggestions(analysis),
+            "language": request.language,
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    async def _generate_demo_chat_response(self, request: ChatRequest) -> Dict[str, Any]:
+        if self.demo_latency:
+            await asyncio.sleep(self.demo_latency)
+        return {
+            **_DEMO_META,
+            "response": (
+                f"(demo mode) You asked: {request.message!r}. Start a local "
+                "vLLM server to get real model answers; this endpoint will "
+                "switch over automatically."
+            ),
+            "timestamp": datetime.now().isoformat(),
+        }
+
+    def _get_demo_code_by_language(self, prompt: str, language: str) -> str:
+        return _demo_code(prompt, language)
+
+    def _get_demo_analysis_by_type(self, analysis_type: str) -> str:
+        return _DEMO_ANALYSES.get(analysis_type, _DEMO_ANALYSES["general"])
+
+
+@lru_cache(maxsize=1)
+def _system_profile() -> Dict[str, Any]:
+    """Hardware snapshot taken once per process.
+
+    torch import costs seconds cold, so it is skipped entirely when
+    find_spec says it is absent, and the psutil probes are syscalls we
+    have no reason to repeat per server start.
+    """
+    import psutil
+
+    profile = {
+        "has_gpu": False,
+        "gpu_memory_gb": 0.0,
+        "gpu_capability": (0, 0),
+        "ram_gb": psutil.virtual_memory().total / (1024 ** 3),
+        "cpu_count": psutil.cpu_count(),
+    }
+    from importlib import util
+
+    if util.find_spec("torch") is not None:
+        import torch
+
+        if torch.cuda.is_available():
+            profile["has_gpu"] = True
+            profile["gpu_memory_gb"] = (
+                torch.cuda.get_device_properties(0).total_memory / (1024 ** 3)
+            )
+            profile["gpu_capability"] = torch.cuda.get_device_capability(0)
+    else:
+        logger.info("torch not installed, assuming CPU-only deployment")
+    return profile
+
+
+class vLLMServerManager:
+    """Starts and supervises a local `vllm serve` subprocess."""
+
+    # Lines vLLM's OpenAI server prints once it is accepting requests.
+    _READY_RE = re.compile(rb"Uvicorn running on|Application startup complete")
+
+    def __init__(self):
+        self.server_process: Optional[asyncio.subprocess.Process] = None
+        self.server_config = self._detect_optimal_config()
+        # server_config is fixed after detection, so the argv is too;
+        # build it once instead of re-branching on every (re)start.
+        self.argv: tuple = tuple(self._build_server_command())
+        self.ready = asyncio.Event()
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def _detect_optimal_config(self) -> Dict[str, Any]:
+        profile = _system_profile()
+        config = {
+            "model": "deepseek-ai/deepseek-coder-6.7b-instruct",
+            "host": "0.0.0.0",
+            "port": 8000,
+            # Prompts are ~1KB scaffolds and completions cap at 4096
+            # tokens, so 8K context is plenty; a 32K window would only
+            # eat KV-cache budget that batching can use instead.
+            "max_model_len": 8192,
+            "gpu_memory_utilization": 0.9,
+            "dtype": "auto",
+            "quantization": None,
+            "kv_cache_dtype": None,
+        }
+        if profile["has_gpu"]:
+            # Decode is memory-bandwidth-bound: fewer bytes moved per
+            # token means proportionally more tokens/sec, so quantize
+            # whenever the hardware supports it, not just when VRAM is
+            # short.
+            capability = profile["gpu_capability"]
+            if capability >= (8, 9):  # Ada / Hopper: native FP8
+                config["quantization"] = "fp8"
+                config["kv_cache_dtype"] = "fp8_e5m2"
+            elif capability >= (8, 0):  # Ampere
+                config["quantization"] = "awq"
+            if profile["gpu_memory_gb"] < 16:
+                config["quantization"] = config["quantization"] or "awq"
+                config["gpu_memory_utilization"] = 0.85
+            if config["quantization"] == "awq":
+                # AWQ in vLLM loads pre-quantized weights only; it does
+                # not quantize an fp16 checkpoint on the fly (unlike
+                # fp8), so serve the published AWQ conversion instead.
+                config["model"] = "TheBloke/deepseek-coder-6.7B-instruct-AWQ"
+        else:
+            config["dtype"] = "float32"
+        if profile["ram_gb"] < 16:
+            config["max_model_len"] = 4096
+        config["cpu_count"] = profile["cpu_count"]
+        return config
+
+    def _build_server_command(self) -> list:
+        cmd = [
+            "vllm",
+            "serve",
+            self.server_config["model"],
+            "--host",
+            self.server_config["host"],
+            "--port",
+            str(self.server_config["port"]),
+            "--max-model-len",
+            str(self.server_config["max_model_len"]),
+            "--dtype",
+            self.server_config["dtype"],
+            # The <think> scaffold at the head of every prompt is
+            # identical across requests; prefix caching reuses its KV
+            # blocks so shared-prefix prefill costs nearly nothing.
+            "--enable-prefix-caching",
+        ]
+        if self.server_config["quantization"]:
+            cmd.extend(["--quantization", self.server_config["quantization"]])
+        if self.server_config["kv_cache_dtype"]:
+            cmd.extend(["--kv-cache-dtype", self.server_config["kv_cache_dtype"]])
+        if self.server_config["gpu_memory_utilization"]:
+            cmd.extend(
+                [
+                    "--gpu-memory-utilization",
+                    str(self.server_config["gpu_memory_utilization"]),
+                ]
+            )
+        return cmd
+
+    async def start_server(self) -> bool:
+        if self.server_process is not None and self.server_process.returncode is None:
+            return True
+        logger.info("starting vLLM server: %s", shlex.join(self.argv))
+        self.ready = asyncio.Event()
+        try:
+            self.server_process = await asyncio.create_subprocess_exec(
+                *self.argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+        except FileNotFoundError:
+            logger.warning("vllm binary not found; staying in demo mode")
+            return False
+        # The pipe must be drained continuously: an unread PIPE fills
+        # the ~64KB kernel buffer and silently wedges the server.
+        self._drain_task = asyncio.create_task(
+            self._drain(self.server_process.stdout)
+        )
+        return await self._wait_for_server_ready()
+
+    async def _drain(self, stream) -> None:
+        async for line in stream:
+            if not self.ready.is_set() and self._READY_RE.search(line):
+                self.ready.set()
+
+    async def _wait_for_server_ready(self, timeout: float = 300.0) -> bool:
+        ready_task = asyncio.create_task(self.ready.wait())
+        exit_task = asyncio.create_task(self.server_process.wait())
+        try:
+            async with asyncio.timeout(timeout):
+                done, _ = await asyncio.wait(
+                    {ready_task, exit_task}, return_when=asyncio.FIRST_COMPLETED
+                )
+        except (asyncio.TimeoutError, TimeoutError):
+            done = set()
+        ready_task.cancel()
+        exit_task.cancel()
+        if ready_task in done and self.ready.is_set():
+            return True
+        if exit_task in done:
+            logger.error("vLLM server exited during startup")
+        else:
+            logger.error("vLLM server not ready after %.0fs", timeout)
+        return False
+
+    async def stop_server(self) -> None:
+        if self._drain_task is not None:
+            self._drain_task.cancel()
+        if self.server_process is not None and self.server_process.returncode is None:
+            self.server_process.terminate()
+            try:
+                async with asyncio.timeout(10.0):
+                    await self.server_process.wait()
+            except (asyncio.TimeoutError, TimeoutError):
+                self.server_process.kill()
+                await self.server_process.wait()
+
+
+app = FastAPI(
+    title="mmZeroCostXCode Production Server",
+    version="1.0.0",
+    default_response_class=_DefaultResponse,
+)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+integration = ProductionvLLMIntegration()
+server_manager = vLLMServerManager()
+
+
+@app.on_event("startup")
+async def startup_event():
+    available = await integration.check_vllm_server()
+    logger.info("vLLM server %s", "available" if available else "unavailable, demo mode")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await integration.aclose()
+    await server_manager.stop_server()
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "healthy",
+        "vllm_available": integration.vllm_available,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.get("/api/status")
+async def status():
+    return {
+        "server": "production",
+        "model": integration.model_name,
+        "mode": "production" if integration.vllm_available else "demonstration",
+        "timestamp": datetime.now().isoformat(),
+    }
+
+
+@app.post("/api/generate-code")
+async def generate_code(request: CodeGenerationRequest, response: Response):
+    try:
+        result = await integration.generate_code(request)
+        response.headers["X-Cache"] = result.pop("x_cache", "MISS")
+        return result
+    except Exception as exc:
+        logger.exception("code generation failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+@app.post("/api/analyze-code")
+async def analyze_code(request: CodeAnalysisRequest, response: Response):
+    try:
+        result = await integration.analyze_code(request)
+        response.headers["X-Cache"] = result.pop("x_cache", "MISS")
+        return result
+    except Exception as exc:
+        logger.exception("code analysis failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _sse(token_gen):
+    """Wrap a token generator in SSE framing for StreamingResponse."""
+
+    async def events():
+        async for token in token_gen:
+            yield f"data: {json.dumps(token)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/api/generate-code/stream")
+async def generate_code_stream(request: CodeGenerationRequest):
+    return _sse(integration.stream_generated_code(request))
+
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest):
+    return _sse(integration.stream_chat(request))
+
+
+@app.post("/api/chat")
+async def chat(request: ChatRequest, response: Response):
+    try:
+        result = await integration.chat_response(request)
+        response.headers["X-Cache"] = result.pop("x_cache", "MISS")
+        return result
+    except Exception as exc:
+        logger.exception("chat failed")
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+if __name__ == "__main__":
+    try:
+        import uvloop  # noqa: F401
+        loop_impl, http_impl = "uvloop", "httptools"
+    except ImportError:
+        loop_impl, http_impl = "asyncio", "auto"
+
+    uvicorn.run(
+        "production_server:app",
+        host="0.0.0.0",
+        port=8080,
+        loop=loop_impl,
+        http=http_impl,
+        log_level="info",
+    )
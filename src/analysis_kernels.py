@@ -0,0 +1,64 @@
+"""Numeric kernels for code analysis.
+
+Byte-level statistics over submitted code, vectorized with numpy and
+JIT-compiled with numba when those packages are installed. Both are
+optional: without numpy the kernels fall back to pure Python, so the
+servers run unchanged in minimal environments.
+"""
+
+from typing import Any, Dict
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+if np is not None and njit is not None:
+
+    @njit(cache=True, fastmath=True)
+    def _scan_kernel(buf):  # pragma: no cover - compiled path
+        newlines = 0
+        non_ascii = 0
+        for i in range(buf.size):
+            byte = buf[i]
+            if byte == 10:
+                newlines += 1
+            elif byte > 127:
+                non_ascii += 1
+        return newlines, non_ascii
+
+else:
+    _scan_kernel = None
+
+
+def _scan(data: bytes):
+    if _scan_kernel is not None:
+        buf = np.frombuffer(data, dtype=np.uint8)
+        return _scan_kernel(buf)
+    return data.count(b"\n"), sum(1 for byte in data if byte > 127)
+
+
+def token_stats(code: str) -> Dict[str, Any]:
+    """Cheap structural metrics for a code snippet.
+
+    Returns byte size, line count, average line length and the ratio of
+    non-ASCII bytes (a quick proxy for binary or pasted-rich-text
+    input). One pass over the raw bytes; no per-line string splitting.
+    """
+    data = code.encode("utf-8")
+    if not data:
+        return {"bytes": 0, "lines": 0, "avg_line_length": 0.0, "non_ascii_ratio": 0.0}
+    newlines, non_ascii = _scan(data)
+    lines = newlines + (0 if data.endswith(b"\n") else 1)
+    return {
+        "bytes": len(data),
+        "lines": lines,
+        "avg_line_length": len(data) / max(lines, 1),
+        "non_ascii_ratio": non_ascii / len(data),
+    }
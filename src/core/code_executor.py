@@ -0,0 +1,594 @@
+"""Sandboxed code execution for user-submitted snippets.
+
+Runs Python, JavaScript and Bash snippets in per-execution scratch
+directories under the workspace, with wall-clock timeouts and output
+size caps. Terminal commands go through a dangerous-command screen
+before execution.
+"""
+
+import asyncio
+import codecs
+import contextlib
+import inspect
+import io
+import json
+import logging
+import os
+import re
+import shlex
+import shutil
+import signal
+import socket
+import struct
+import traceback
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+# Parent cgroup for per-execution memory/CPU slices; requires a
+# writable cgroup v2 hierarchy (typical inside containers run with
+# cgroupns). When unavailable we fall back to RLIMIT_AS in the child.
+_CGROUP_BASE = Path("/sys/fs/cgroup/zerocostxcode")
+
+# Read size for subprocess pipes; one page-cache-friendly chunk per
+# loop iteration instead of buffering the whole output in communicate().
+_PIPE_CHUNK = 65536
+
+# Commands containing any of these need /bin/sh semantics (pipes,
+# redirects, expansion); everything else is exec'd directly.
+_SHELL_CHARS = frozenset("|&;<>$`*?~(){}[]\n'\"\\")
+
+# Blocked-command patterns and their matchers, built once at import so
+# nothing is constructed per executor instance or per request. Matches
+# are only honoured on word boundaries: a raw substring scan blocked
+# "echo result" ("su") and "git add" ("dd").
+_DANGEROUS = (
+    "chmod 777",
+    "dd",
+    "fdisk",
+    "iptables",
+    "mkfs",
+    "mount",
+    "passwd",
+    "rm -rf",
+    "service",
+    "su",
+    "sudo",
+    "systemctl",
+    "ufw",
+    "umount",
+)
+_DANGER_RE = re.compile("|".join(rf"\b{re.escape(_word)}\b" for _word in _DANGEROUS))
+
+
+def _word_bounded(text: str, start: int, end: int) -> bool:
+    """True when ``text[start:end + 1]`` is not embedded in a longer word."""
+    if start and (text[start - 1].isalnum() or text[start - 1] == "_"):
+        return False
+    nxt = end + 1
+    return not (nxt < len(text) and (text[nxt].isalnum() or text[nxt] == "_"))
+
+
+if ahocorasick is not None:
+    _DANGER_AC = ahocorasick.Automaton()
+    for _word in _DANGEROUS:
+        _DANGER_AC.add_word(_word, _word)
+    _DANGER_AC.make_automaton()
+else:
+    _DANGER_AC = None
+
+
+def _recv_exact(sock: socket.socket, count: int) -> bytes:
+    """Blocking exact read used inside worker children."""
+    chunks = []
+    while count:
+        chunk = sock.recv(count)
+        if not chunk:
+            return b""
+        chunks.append(chunk)
+        count -= len(chunk)
+    return b"".join(chunks)
+
+
+class _PythonWorker:
+    """One pre-forked interpreter blocking on a socketpair for snippets."""
+
+    def __init__(self, memory_limit: int):
+        parent_sock, child_sock = socket.socketpair()
+        pid = os.fork()
+        if pid == 0:
+            parent_sock.close()
+            try:
+                self._child_loop(child_sock, memory_limit)
+            finally:
+                os._exit(0)
+        child_sock.close()
+        parent_sock.setblocking(False)
+        self.pid = pid
+        self.sock = parent_sock
+
+    @staticmethod
+    def _child_loop(sock: socket.socket, memory_limit: int) -> None:
+        if resource is not None:
+            with contextlib.suppress(ValueError, OSError):
+                resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+        while True:
+            header = _recv_exact(sock, 4)
+            if not header:
+                return
+            (length,) = struct.unpack(">I", header)
+            request = json.loads(_recv_exact(sock, length))
+            cwd = request.get("cwd")
+            if cwd:
+                with contextlib.suppress(OSError):
+                    os.chdir(cwd)
+            out, err = io.StringIO(), io.StringIO()
+            rc = 0
+            try:
+                with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    exec(  # noqa: S102 - sandboxed snippet execution is the point
+                        compile(request["code"], "<user>", "exec"),
+                        {"__name__": "__main__"},
+                    )
+            except SystemExit as exc:
+                rc = exc.code if isinstance(exc.code, int) else (0 if exc.code is None else 1)
+            except BaseException:
+                traceback.print_exc(file=err)
+                rc = 1
+            payload = json.dumps(
+                {"rc": rc, "stdout": out.getvalue(), "stderr": err.getvalue()}
+            ).encode("utf-8")
+            sock.sendall(struct.pack(">I", len(payload)) + payload)
+
+    def kill(self) -> None:
+        with contextlib.suppress(ProcessLookupError, OSError):
+            os.kill(self.pid, signal.SIGKILL)
+        with contextlib.suppress(OSError, ChildProcessError):
+            os.waitpid(self.pid, os.WNOHANG)
+        self.sock.close()
+
+
+class _PythonWorkerPool:
+    """Warm pool of forked interpreters for Python snippets.
+
+    A fresh python3 process pays interpreter startup plus site imports
+    (tens to hundreds of ms) per snippet; a pre-forked worker answers in
+    one IPC round-trip and shares heap pages with the parent. Workers
+    that time out or crash are SIGKILLed and replaced.
+    """
+
+    def __init__(self, size: int = 4, memory_limit: int = 512 * 1024 * 1024):
+        self._size = size
+        self._memory_limit = memory_limit
+        self._idle: "asyncio.Queue[_PythonWorker]" = asyncio.Queue()
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+    async def _ensure_started(self) -> None:
+        if self._started:
+            return
+        async with self._start_lock:
+            if self._started:
+                return
+            for _ in range(self._size):
+                self._idle.put_nowait(_PythonWorker(self._memory_limit))
+            self._started = True
+
+    async def _recv_exact_async(self, sock: socket.socket, count: int) -> bytes:
+        loop = asyncio.get_running_loop()
+        chunks = []
+        while count:
+            chunk = await loop.sock_recv(sock, count)
+            if not chunk:
+                raise ConnectionResetError("worker closed the socket")
+            chunks.append(chunk)
+            count -= len(chunk)
+        return b"".join(chunks)
+
+    async def submit(self, code: str, cwd: str, timeout: float) -> Dict[str, Any]:
+        await self._ensure_started()
+        worker = await self._idle.get()
+        loop = asyncio.get_running_loop()
+        try:
+            payload = json.dumps({"code": code, "cwd": cwd}).encode("utf-8")
+            await loop.sock_sendall(
+                worker.sock, struct.pack(">I", len(payload)) + payload
+            )
+            async with asyncio.timeout(timeout):
+                header = await self._recv_exact_async(worker.sock, 4)
+                (length,) = struct.unpack(">I", header)
+                raw = await self._recv_exact_async(worker.sock, length)
+        except BaseException:
+            # Timeout, cancellation or a broken worker: replace it so the
+            # pool keeps its size, then let the caller handle the error.
+            worker.kill()
+            self._idle.put_nowait(_PythonWorker(self._memory_limit))
+            raise
+        self._idle.put_nowait(worker)
+        return json.loads(raw)
+
+    def shutdown(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().kill()
+        self._started = False
+
+
+class SecureCodeExecutor:
+    """Executes untrusted code snippets with timeouts and output caps."""
+
+    # Canonical language -> (file extension, handler method). Unknown
+    # languages fall back to the Python entry.
+    _LANG_TABLE = {
+        "python": (".py", "_execute_python"),
+        "javascript": (".js", "_execute_javascript"),
+        "js": (".js", "_execute_javascript"),
+        "bash": (".sh", "_execute_bash"),
+        "sh": (".sh", "_execute_bash"),
+    }
+
+    def __init__(self, workspace_dir: str = "./workspace"):
+        self.workspace_dir = Path(workspace_dir)
+        self.workspace_dir.mkdir(parents=True, exist_ok=True)
+        self.max_execution_time = 30.0
+        self.max_memory = 512 * 1024 * 1024
+        self.max_output_size = 1024 * 1024
+        self._pool = (
+            _PythonWorkerPool(memory_limit=self.max_memory)
+            if hasattr(os, "fork")
+            else None
+        )
+        self._cgroup_base: Optional[Path] = None
+        try:
+            _CGROUP_BASE.mkdir(exist_ok=True)
+            self._cgroup_base = _CGROUP_BASE
+        except OSError:
+            logger.debug("cgroup v2 unavailable, using rlimit fallback")
+
+    def get_supported_languages(self) -> List[str]:
+        """Language names accepted by :meth:`execute_code`, aliases included."""
+        return list(self._LANG_TABLE)
+
+    async def execute_code(self, code: str, language: str = "python") -> Dict[str, Any]:
+        """Run ``code`` with the language runtime.
+
+        Python snippets never touch the filesystem: they go to the warm
+        worker pool, or to ``python3 -`` over stdin as the fallback.
+        Other languages still get a scratch directory because their
+        runtimes want a file on disk.
+        """
+        ext, handler_name = self._LANG_TABLE.get(
+            language.lower(), self._LANG_TABLE["python"]
+        )
+        if handler_name == "_execute_python":
+            return await self._execute_python_source(code, str(self.workspace_dir))
+
+        exec_id = uuid.uuid4().hex
+        exec_dir = self.workspace_dir / f"exec_{exec_id}"
+        exec_dir.mkdir(parents=True, exist_ok=True)
+        code_file = exec_dir / f"snippet{ext}"
+        code_file.write_text(code, encoding="utf-8")
+
+        try:
+            return await getattr(self, handler_name)(code_file, exec_dir)
+        finally:
+            # Teardown walks and unlinks the whole directory; push it to
+            # the default executor so the event loop never waits on it.
+            cleanup = asyncio.get_running_loop().run_in_executor(
+                None, shutil.rmtree, exec_dir, True
+            )
+            cleanup.add_done_callback(
+                lambda fut: fut.exception()
+                and logger.warning("scratch cleanup failed: %s", fut.exception())
+            )
+
+    async def _execute_python(self, code_file: Path, exec_dir: Path) -> Dict[str, Any]:
+        return await self._execute_python_source(
+            code_file.read_text(encoding="utf-8"), str(exec_dir)
+        )
+
+    async def _execute_python_source(self, code: str, cwd: str) -> Dict[str, Any]:
+        if self._pool is not None:
+            try:
+                result = await self._pool.submit(code, cwd, self.max_execution_time)
+            except (asyncio.TimeoutError, TimeoutError):
+                return {
+                    "success": False,
+                    "error": f"Execution timed out after {self.max_execution_time}s",
+                    "stdout": "",
+                    "stderr": "",
+                    "return_code": -1,
+                }
+            except OSError:
+                logger.warning("worker pool unavailable, falling back to subprocess")
+            else:
+                return {
+                    "success": result["rc"] == 0,
+                    "stdout": result["stdout"][: self.max_output_size],
+                    "stderr": result["stderr"][: self.max_output_size],
+                    "return_code": result["rc"],
+                }
+        # python3 - reads the snippet from stdin: no script file, no
+        # per-execution directory to create and tear down.
+        return await self._run_subprocess(
+            ["python3", "-"], cwd=cwd, input_bytes=code.encode("utf-8")
+        )
+
+    async def _execute_javascript(self, code_file: Path, exec_dir: Path) -> Dict[str, Any]:
+        return await self._run_subprocess(["node", str(code_file)], cwd=str(exec_dir))
+
+    async def _execute_bash(self, code_file: Path, exec_dir: Path) -> Dict[str, Any]:
+        return await self._run_subprocess(["bash", str(code_file)], cwd=str(exec_dir))
+
+    def _create_exec_cgroup(self) -> Optional[Path]:
+        """Make a transient cgroup slice with memory and CPU caps."""
+        if self._cgroup_base is None:
+            return None
+        slice_dir = self._cgroup_base / f"exec_{uuid.uuid4().hex}"
+        try:
+            slice_dir.mkdir()
+            (slice_dir / "memory.max").write_text(str(self.max_memory))
+            (slice_dir / "cpu.max").write_text("50000 100000")
+        except OSError:
+            with contextlib.suppress(OSError):
+                slice_dir.rmdir()
+            return None
+        return slice_dir
+
+    def _limit_preexec(self, cgroup_dir: Optional[Path]):
+        """Build the between-fork-and-exec hook that applies the caps.
+
+        Writing "0" to cgroup.procs moves the child itself into the
+        slice before user code runs; without a cgroup we clamp address
+        space with RLIMIT_AS instead.
+        """
+        max_memory = self.max_memory
+        procs_path = None if cgroup_dir is None else str(cgroup_dir / "cgroup.procs")
+
+        def _apply():
+            if procs_path is not None:
+                try:
+                    with open(procs_path, "w") as procs:
+                        procs.write("0")
+                    return
+                except OSError:
+                    pass
+            if resource is not None:
+                try:
+                    resource.setrlimit(resource.RLIMIT_AS, (max_memory, max_memory))
+                except (ValueError, OSError):
+                    pass
+
+        return _apply
+
+    async def _kill_process_tree(self, process) -> None:
+        """SIGTERM the child's whole process group, escalating to
+        SIGKILL after a 2s grace so spawned grandchildren cannot leak."""
+        try:
+            pgid = os.getpgid(process.pid)
+        except ProcessLookupError:
+            await process.wait()
+            return
+        with contextlib.suppress(ProcessLookupError, PermissionError):
+            os.killpg(pgid, signal.SIGTERM)
+        try:
+            async with asyncio.timeout(2.0):
+                await process.wait()
+        except (asyncio.TimeoutError, TimeoutError):
+            with contextlib.suppress(ProcessLookupError, PermissionError):
+                os.killpg(pgid, signal.SIGKILL)
+            await process.wait()
+
+    @staticmethod
+    async def _feed_stdin(process, input_bytes: bytes) -> None:
+        process.stdin.write(input_bytes)
+        with contextlib.suppress(BrokenPipeError, ConnectionResetError):
+            await process.stdin.drain()
+        process.stdin.close()
+
+    async def _drain_pipe(self, process, stream, parts, on_chunk=None) -> None:
+        """Pump one subprocess pipe in 64 KiB chunks.
+
+        Decodes incrementally so UTF-8 work overlaps the child's I/O,
+        forwards raw bytes to ``on_chunk`` when a streaming consumer is
+        attached, and kills the process group the moment the stream
+        passes the output cap instead of buffering the excess.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        limit = self.max_output_size
+        total = 0
+        capped = False
+        while True:
+            chunk = await stream.read(_PIPE_CHUNK)
+            if not chunk:
+                break
+            if on_chunk is not None:
+                maybe = on_chunk(chunk)
+                if inspect.isawaitable(maybe):
+                    await maybe
+            room = limit - total
+            total += len(chunk)
+            if room > 0:
+                parts.append(decoder.decode(chunk[:room]))
+            if total > limit and not capped:
+                capped = True
+                with contextlib.suppress(ProcessLookupError, PermissionError):
+                    os.killpg(os.getpgid(process.pid), signal.SIGKILL)
+        parts.append(decoder.decode(b"", final=True))
+
+    async def _communicate_capped(
+        self, process, input_bytes: Optional[bytes] = None, on_stdout=None
+    ):
+        """communicate() replacement: concurrent capped reads of both
+        pipes with incremental decoding, plus optional stdin feeding."""
+        out_parts: list = []
+        err_parts: list = []
+        pumps = [
+            self._drain_pipe(process, process.stdout, out_parts, on_stdout),
+            self._drain_pipe(process, process.stderr, err_parts),
+        ]
+        if input_bytes is not None:
+            pumps.append(self._feed_stdin(process, input_bytes))
+        await asyncio.gather(*pumps)
+        await process.wait()
+        return "".join(out_parts), "".join(err_parts)
+
+    async def _run_subprocess(
+        self,
+        cmd,
+        cwd: str,
+        input_bytes: Optional[bytes] = None,
+        on_stdout=None,
+    ) -> Dict[str, Any]:
+        cgroup_dir = self._create_exec_cgroup()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                cwd=cwd,
+                stdin=asyncio.subprocess.PIPE if input_bytes is not None else None,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+                preexec_fn=self._limit_preexec(cgroup_dir),
+            )
+            # asyncio.timeout scopes the wait without spawning the extra
+            # Task that asyncio.wait_for creates per call.
+            try:
+                async with asyncio.timeout(self.max_execution_time):
+                    stdout, stderr = await self._communicate_capped(
+                        process, input_bytes, on_stdout
+                    )
+            except (asyncio.TimeoutError, TimeoutError):
+                await self._kill_process_tree(process)
+                return {
+                    "success": False,
+                    "error": f"Execution timed out after {self.max_execution_time}s",
+                    "stdout": "",
+                    "stderr": "",
+                    "return_code": -1,
+                }
+
+            return {
+                "success": process.returncode == 0,
+                "stdout": stdout,
+                "stderr": stderr,
+                "return_code": process.returncode,
+            }
+        except FileNotFoundError:
+            return {
+                "success": False,
+                "error": f"Runtime not found: {cmd[0]}",
+                "stdout": "",
+                "stderr": "",
+                "return_code": -1,
+            }
+        finally:
+            if cgroup_dir is not None:
+                with contextlib.suppress(OSError):
+                    cgroup_dir.rmdir()
+
+    async def _run_subprocess_streaming(
+        self, cmd, cwd: str, on_stdout, input_bytes: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """Run ``cmd`` forwarding stdout chunks to ``on_stdout`` as they
+        arrive (e.g. to a websocket) instead of waiting for exit.
+
+        ``on_stdout`` receives raw bytes and may be sync or async. The
+        full transcript is still returned for callers that log or cache
+        it; time-to-first-byte no longer waits for the process to finish.
+        """
+        return await self._run_subprocess(
+            cmd, cwd=cwd, input_bytes=input_bytes, on_stdout=on_stdout
+        )
+
+    @staticmethod
+    def _find_dangerous(command_lower: str) -> Optional[str]:
+        if _DANGER_AC is not None:
+            # The automaton matches substrings, so re-check boundaries
+            # before blocking: "su" must not hit inside "result".
+            for end, word in _DANGER_AC.iter(command_lower):
+                if _word_bounded(command_lower, end - len(word) + 1, end):
+                    return word
+            return None
+        match = _DANGER_RE.search(command_lower)
+        return None if match is None else match.group(0)
+
+    async def execute_terminal_command(self, command: str, cwd: str = None) -> Dict[str, Any]:
+        """Run a terminal command after screening for dangerous patterns."""
+        dangerous = self._find_dangerous(command.lower())
+        if dangerous is not None:
+            return {
+                "success": False,
+                "error": f"Command blocked for security: {dangerous}",
+                "stdout": "",
+                "stderr": "",
+                "return_code": -1,
+            }
+
+        try:
+            if not _SHELL_CHARS.intersection(command):
+                # Plain commands skip the /bin/sh -c hop: one fork+exec
+                # instead of two, and no shell interpreting the string.
+                argv = shlex.split(command)
+                if not argv:
+                    return {
+                        "success": False,
+                        "error": "Empty command",
+                        "stdout": "",
+                        "stderr": "",
+                        "return_code": -1,
+                    }
+                process = await asyncio.create_subprocess_exec(
+                    *argv,
+                    cwd=cwd or str(self.workspace_dir),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+            else:
+                process = await asyncio.create_subprocess_shell(
+                    command,
+                    cwd=cwd or str(self.workspace_dir),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    start_new_session=True,
+                )
+            try:
+                async with asyncio.timeout(self.max_execution_time):
+                    stdout, stderr = await self._communicate_capped(process)
+            except (asyncio.TimeoutError, TimeoutError):
+                await self._kill_process_tree(process)
+                return {
+                    "success": False,
+                    "error": f"Command timed out after {self.max_execution_time}s",
+                    "stdout": "",
+                    "stderr": "",
+                    "return_code": -1,
+                }
+
+            return {
+                "success": process.returncode == 0,
+                "stdout": stdout,
+                "stderr": stderr,
+                "return_code": process.returncode,
+            }
+        except Exception as exc:
+            logger.exception("terminal command failed")
+            return {
+                "success": False,
+                "error": str(exc),
+                "stdout": "",
+                "stderr": "",
+                "return_code": -1,
+            }
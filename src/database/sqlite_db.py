@@ -0,0 +1,241 @@
+"""
+SQLite database layer for the Zero Cost Code Agent backend.
+
+Provides a small pooled aiosqlite wrapper plus the user / project / file
+persistence used by complete_backend.py.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "zerocostxcode.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT UNIQUE NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    password_hash TEXT NOT NULL,
+    is_active INTEGER DEFAULT 1,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    owner_id INTEGER NOT NULL REFERENCES users(id),
+    name TEXT NOT NULL,
+    description TEXT DEFAULT '',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    project_id INTEGER NOT NULL REFERENCES projects(id),
+    path TEXT NOT NULL,
+    content TEXT DEFAULT '',
+    sha256 TEXT DEFAULT '',
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(project_id, path)
+);
+
+CREATE INDEX IF NOT EXISTS idx_projects_owner ON projects(owner_id);
+CREATE INDEX IF NOT EXISTS idx_files_project ON files(project_id);
+"""
+
+
+class ConnectionPool:
+    """A minimal asyncio connection pool over aiosqlite."""
+
+    def __init__(self, db_path: Path, size: int = 5):
+        self.db_path = db_path
+        self.size = size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._initialized = False
+
+    async def init(self) -> None:
+        if self._initialized:
+            return
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(self.size):
+            conn = await aiosqlite.connect(self.db_path)
+            conn.row_factory = aiosqlite.Row
+            await conn.execute("PRAGMA journal_mode=WAL")
+            await conn.execute("PRAGMA synchronous=NORMAL")
+            await self._queue.put(conn)
+        self._initialized = True
+
+    def connection(self) -> "_PooledConnection":
+        return _PooledConnection(self)
+
+    async def close(self) -> None:
+        while not self._queue.empty():
+            conn = await self._queue.get()
+            await conn.close()
+        self._initialized = False
+
+
+class _PooledConnection:
+    """Async context manager handing out a pooled connection."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self.conn: Optional[aiosqlite.Connection] = None
+
+    async def __aenter__(self) -> aiosqlite.Connection:
+        self.conn = await self.pool._queue.get()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if self.conn is not None:
+            await self.pool._queue.put(self.conn)
+            self.conn = None
+
+
+def _hash_password(password: str) -> str:
+    return hashlib.sha256(password.encode("utf-8")).hexdigest()
+
+
+class SQLiteDB:
+    """All persistence used by the complete backend."""
+
+    def __init__(self, db_path: Path = DB_PATH):
+        self.pool = ConnectionPool(db_path)
+
+    async def init_db(self) -> None:
+        await self.pool.init()
+        async with self.pool.connection() as db:
+            await db.executescript(SCHEMA)
+            await db.commit()
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    @asynccontextmanager
+    async def _acquire(self, conn: Optional[aiosqlite.Connection] = None):
+        """Yield the caller-supplied connection, or borrow one from the pool.
+
+        Lets long-lived callers (e.g. a WebSocket session) pin a single
+        connection instead of re-acquiring per operation.
+        """
+        if conn is not None:
+            yield conn
+        else:
+            async with self.pool.connection() as db:
+                yield db
+
+    # -- users ---------------------------------------------------------
+
+    async def create_user(self, username: str, email: str, password: str) -> Dict[str, Any]:
+        async with self.pool.connection() as db:
+            cursor = await db.execute(
+                "INSERT INTO users (username, email, password_hash) VALUES (?, ?, ?) "
+                "RETURNING id, created_at",
+                (username, email, _hash_password(password)),
+            )
+            row = await cursor.fetchone()
+            await db.commit()
+            return {
+                "id": row[0],
+                "username": username,
+                "email": email,
+                "created_at": row[1],
+            }
+
+    async def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
+        async with self.pool.connection() as db:
+            cursor = await db.execute(
+                "SELECT id, username, email, password_hash FROM users "
+                "WHERE username = ? AND is_active = 1",
+                (username,),
+            )
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        # Hash off the event loop (the digest releases the GIL on large
+        # inputs) and compare in constant time.
+        ok = await asyncio.to_thread(
+            lambda: hmac.compare_digest(_hash_password(password), row[3])
+        )
+        if not ok:
+            return None
+        return {"id": row[0], "username": row[1], "email": row[2]}
+
+    # -- projects ------------------------------------------------------
+
+    async def create_project(self, owner_id: int, name: str, description: str = "") -> Dict[str, Any]:
+        async with self.pool.connection() as db:
+            cursor = await db.execute(
+                "INSERT INTO projects (owner_id, name, description) VALUES (?, ?, ?) "
+                "RETURNING id, created_at",
+                (owner_id, name, description),
+            )
+            row = await cursor.fetchone()
+            await db.commit()
+            return {
+                "id": row[0],
+                "owner_id": owner_id,
+                "name": name,
+                "description": description,
+                "created_at": row[1],
+            }
+
+    async def get_user_projects(self, owner_id: int) -> List[Dict[str, Any]]:
+        async with self.pool.connection() as db:
+            cursor = await db.execute(
+                "SELECT id, owner_id, name, description, created_at "
+                "FROM projects WHERE owner_id = ? ORDER BY id",
+                (owner_id,),
+            )
+            rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+    # -- files ---------------------------------------------------------
+
+    async def save_file(
+        self,
+        project_id: int,
+        path: str,
+        content: str,
+        sha256: str = "",
+        conn: Optional[aiosqlite.Connection] = None,
+    ) -> Dict[str, Any]:
+        async with self._acquire(conn) as db:
+            cursor = await db.execute(
+                "INSERT INTO files (project_id, path, content, sha256) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(project_id, path) DO UPDATE SET content=excluded.content, "
+                "sha256=excluded.sha256 RETURNING id, created_at",
+                (project_id, path, content, sha256),
+            )
+            row = await cursor.fetchone()
+            await db.commit()
+            return {
+                "id": row[0],
+                "project_id": project_id,
+                "path": path,
+                "sha256": sha256,
+                "created_at": row[1],
+            }
+
+    async def get_project_files(
+        self, project_id: int, conn: Optional[aiosqlite.Connection] = None
+    ) -> List[Dict[str, Any]]:
+        async with self._acquire(conn) as db:
+            cursor = await db.execute(
+                "SELECT id, project_id, path, content, sha256, created_at "
+                "FROM files WHERE project_id = ? ORDER BY path",
+                (project_id,),
+            )
+            rows = await cursor.fetchall()
+        return [dict(row) for row in rows]
+
+
+db = SQLiteDB()
@@ -0,0 +1,487 @@
+"""Client for a locally hosted DeepSeek model behind a vLLM server.
+
+Speaks the OpenAI-compatible API exposed by vLLM: chat completions,
+streaming via SSE, plus health and model-info probes. All calls share
+one pooled transport — httpx with HTTP/2 when available, so concurrent
+generations multiplex over one connection, with aiohttp as the
+fallback — keeping keep-alive, connection pooling and the DNS cache
+warm across requests.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+logger = logging.getLogger(__name__)
+
+
+def _loads(raw: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+_CLIENT_ERRORS: Tuple = ()
+if httpx is not None:
+    _CLIENT_ERRORS += (httpx.HTTPError,)
+if aiohttp is not None:
+    _CLIENT_ERRORS += (aiohttp.ClientError,)
+
+
+def _cache_key(messages: List[Dict[str, str]], config: "GenerationConfig") -> bytes:
+    raw = _dumps(messages) + _dumps(_payload_template(config))
+    if blake3 is not None:
+        return blake3.blake3(raw).digest()
+    return hashlib.blake2b(raw, digest_size=16).digest()
+
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+
+@dataclass(frozen=True)
+class GenerationConfig:
+    model_name: str = "deepseek-ai/DeepSeek-R1-0528"
+    max_tokens: int = 2048
+    temperature: float = 0.6
+    top_p: float = 0.95
+    presence_penalty: float = 0.0
+    frequency_penalty: float = 0.0
+    stream: bool = False
+
+
+@lru_cache(maxsize=64)
+def _payload_template(config: GenerationConfig) -> Dict[str, Any]:
+    """Everything in the request body except messages, built once per
+    distinct config (hashable now that GenerationConfig is frozen)."""
+    return {
+        "model": config.model_name,
+        "max_tokens": config.max_tokens,
+        "temperature": config.temperature,
+        "top_p": config.top_p,
+        "presence_penalty": config.presence_penalty,
+        "frequency_penalty": config.frequency_penalty,
+        "stream": config.stream,
+    }
+
+
+class _HttpxTransport:
+    """Preferred transport: HTTP/2 multiplexes concurrent generations
+    over a single connection instead of one TCP stream each."""
+
+    def __init__(self):
+        limits = httpx.Limits(max_connections=16, max_keepalive_connections=16)
+        try:
+            self._client = httpx.AsyncClient(http2=True, limits=limits, timeout=None)
+        except ImportError:  # h2 extra not installed
+            self._client = httpx.AsyncClient(limits=limits, timeout=None)
+
+    @property
+    def closed(self) -> bool:
+        return self._client.is_closed
+
+    async def post_json(self, url: str, body: bytes, timeout: float) -> bytes:
+        response = await self._client.post(
+            url, content=body, headers=_JSON_HEADERS, timeout=timeout
+        )
+        response.raise_for_status()
+        return response.content
+
+    async def get(self, url: str, timeout: float) -> Tuple[int, bytes]:
+        response = await self._client.get(url, timeout=timeout)
+        return response.status_code, response.content
+
+    @contextlib.asynccontextmanager
+    async def stream_post(self, url: str, body: bytes):
+        async with self._client.stream(
+            "POST", url, content=body, headers=_JSON_HEADERS, timeout=None
+        ) as response:
+            response.raise_for_status()
+            yield response.aiter_bytes()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+class _AiohttpTransport:
+    """Fallback transport when httpx is not installed."""
+
+    def __init__(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=64,
+                keepalive_timeout=60,
+                enable_cleanup_closed=True,
+            )
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self._session.closed
+
+    async def post_json(self, url: str, body: bytes, timeout: float) -> bytes:
+        async with self._session.post(
+            url,
+            data=body,
+            headers=_JSON_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        ) as response:
+            response.raise_for_status()
+            return await response.read()
+
+    async def get(self, url: str, timeout: float) -> Tuple[int, bytes]:
+        async with self._session.get(
+            url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            return response.status, await response.read()
+
+    @contextlib.asynccontextmanager
+    async def stream_post(self, url: str, body: bytes):
+        async with self._session.post(
+            url,
+            data=body,
+            headers=_JSON_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=None),
+        ) as response:
+            response.raise_for_status()
+            yield response.content.iter_any()
+
+    async def aclose(self) -> None:
+        await self._session.close()
+
+
+def _make_transport():
+    if httpx is not None:
+        return _HttpxTransport()
+    if aiohttp is not None:
+        return _AiohttpTransport()
+    raise RuntimeError("neither httpx nor aiohttp is installed")
+
+
+async def _iter_sse_tokens(byte_iter) -> AsyncGenerator[str, None]:
+    """Yield delta tokens from an OpenAI-style SSE byte stream.
+
+    Splits frames at the bytes level: no per-line str decode or strip,
+    and orjson handles the small payloads.
+    """
+    buf = bytearray()
+    async for chunk in byte_iter:
+        buf += chunk
+        while (newline := buf.find(b"\n")) >= 0:
+            line = bytes(buf[:newline])
+            del buf[: newline + 1]
+            if line.endswith(b"\r"):
+                line = line[:-1]
+            if not line.startswith(b"data: "):
+                continue
+            payload_bytes = line[6:]
+            if payload_bytes == b"[DONE]":
+                return
+            data = _loads(payload_bytes)
+            delta = data["choices"][0].get("delta", {})
+            token = delta.get("content")
+            if token:
+                yield token
+
+
+class _BatchQueue:
+    """Coalesces plain-text completions into array-prompt requests.
+
+    vLLM's /v1/completions accepts a list of prompts and packs them
+    into the same continuous-batching step, so prompts that arrive
+    within the gather window share one HTTP round trip and one engine
+    step. A solo caller with an idle queue takes the fast path and
+    skips the wait entirely.
+    """
+
+    def __init__(self, provider, max_wait: float = 0.005, batch_size: int = 8):
+        self._provider = provider
+        self._max_wait = max_wait
+        self._batch_size = batch_size
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self._solo_inflight = False
+
+    async def submit(self, prompt: str, config: "GenerationConfig") -> str:
+        if self._queue.empty() and not self._solo_inflight:
+            self._solo_inflight = True
+            try:
+                texts = await self._post([prompt], config)
+                return texts[0] if texts else ""
+            finally:
+                self._solo_inflight = False
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._drain())
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, config, future))
+        return await future
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            prompts = [prompt for prompt, _, _ in batch]
+            try:
+                # Sampling params come from the first caller; entries in
+                # one window share a config in practice.
+                texts = await self._post(prompts, batch[0][1])
+            except Exception as exc:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            for (_, _, future), text in zip(batch, texts):
+                if not future.done():
+                    future.set_result(text)
+            for _, _, future in batch[len(texts):]:
+                if not future.done():
+                    future.set_result("")
+
+    async def _post(self, prompts: List[str], config: "GenerationConfig") -> List[str]:
+        payload = {
+            "model": config.model_name,
+            "prompt": prompts,
+            "max_tokens": config.max_tokens,
+            "temperature": config.temperature,
+            "top_p": config.top_p,
+        }
+        transport = await LocalDeepSeekProvider._get_transport()
+        raw = await transport.post_json(
+            f"{self._provider.base_url}/v1/completions",
+            _dumps(payload),
+            self._provider.timeout,
+        )
+        data = _loads(raw)
+        choices = sorted(data.get("choices", []), key=lambda c: c.get("index", 0))
+        return [choice.get("text", "") for choice in choices]
+
+
+class LocalDeepSeekProvider:
+    """Async client for the local vLLM OpenAI-compatible endpoint."""
+
+    _transport = None
+    _transport_lock: Optional[asyncio.Lock] = None
+
+    CACHE_SIZE = 512
+    # Above this temperature outputs are meaningfully sampled, so
+    # serving a cached answer would be wrong.
+    CACHE_MAX_TEMPERATURE = 0.7
+
+    # How long a health_check verdict stays valid. UIs probe health on
+    # every user action; within this window we answer from memory.
+    HEALTH_TTL = 2.0
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        timeout: float = 120.0,
+        max_in_flight: int = 16,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._batch_queue = _BatchQueue(self)
+        self._cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        # Caps concurrent generations so excess callers queue here —
+        # where they can still be cancelled — instead of inside the
+        # vLLM scheduler, keeping its batch depth in the sweet spot.
+        self._sem = asyncio.Semaphore(max_in_flight)
+        self._last_health: Tuple[float, bool] = (0.0, False)
+
+    async def __aenter__(self) -> "LocalDeepSeekProvider":
+        """Warm the shared transport so first requests skip the lazy
+        construction; lets callers manage the provider with
+        ``async with`` or explicit enter/exit hooks."""
+        await self._get_transport()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def complete_text(
+        self, prompt: str, config: Optional[GenerationConfig] = None
+    ) -> str:
+        """Plain-text completion routed through the batching queue."""
+        config = config or GenerationConfig()
+        return await self._batch_queue.submit(prompt, config)
+
+    @classmethod
+    async def _get_transport(cls):
+        """Lazily build the one shared transport (double-checked lock)."""
+        if cls._transport is not None and not cls._transport.closed:
+            return cls._transport
+        if cls._transport_lock is None:
+            cls._transport_lock = asyncio.Lock()
+        async with cls._transport_lock:
+            if cls._transport is None or cls._transport.closed:
+                cls._transport = _make_transport()
+        return cls._transport
+
+    @classmethod
+    async def aclose(cls) -> None:
+        """Close the shared transport; call from the app's shutdown hook."""
+        if cls._transport is not None and not cls._transport.closed:
+            await cls._transport.aclose()
+        cls._transport = None
+
+    def _build_payload(
+        self, messages: List[Dict[str, str]], config: GenerationConfig
+    ) -> Dict[str, Any]:
+        payload = _payload_template(config).copy()
+        payload["messages"] = messages
+        return payload
+
+    async def generate_completion(
+        self,
+        messages: List[Dict[str, str]],
+        config: Optional[GenerationConfig] = None,
+    ) -> Dict[str, Any]:
+        config = config or GenerationConfig()
+        cacheable = (
+            config.temperature <= self.CACHE_MAX_TEMPERATURE and not config.stream
+        )
+        if cacheable:
+            key = _cache_key(messages, config)
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                return hit
+        payload = self._build_payload(messages, config)
+        transport = await self._get_transport()
+        try:
+            async with self._sem:
+                raw = await transport.post_json(
+                    f"{self.base_url}/v1/chat/completions",
+                    _dumps(payload),
+                    self.timeout,
+                )
+            data = _loads(raw)
+            choice = data["choices"][0]
+            result = {
+                "success": True,
+                "content": choice["message"]["content"],
+                "finish_reason": choice.get("finish_reason"),
+                "usage": data.get("usage", {}),
+            }
+            if cacheable:
+                self._cache[key] = result
+                while len(self._cache) > self.CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            return result
+        except _CLIENT_ERRORS as exc:
+            logger.warning("completion request failed: %s", exc)
+            self._last_health = (0.0, False)
+            return {"success": False, "error": str(exc), "content": ""}
+
+    async def generate_streaming_completion(
+        self,
+        messages: List[Dict[str, str]],
+        config: Optional[GenerationConfig] = None,
+    ) -> AsyncGenerator[str, None]:
+        config = config or GenerationConfig(stream=True)
+        payload = self._build_payload(messages, config)
+        payload["stream"] = True
+        transport = await self._get_transport()
+        # One asyncio.timeout covers connect plus response headers; the
+        # token loop itself runs unbounded so long generations are not
+        # killed mid-stream and no per-chunk timeout Task is created.
+        # Callers that want a whole-stream deadline should scope their
+        # own `async with asyncio.timeout(...)` around the iteration.
+        stream_ctx = transport.stream_post(
+            f"{self.base_url}/v1/chat/completions", _dumps(payload)
+        )
+        # Held for the whole stream: a streaming generation occupies a
+        # server slot until the last token, not just until the POST.
+        async with self._sem:
+            async with asyncio.timeout(self.timeout):
+                byte_iter = await stream_ctx.__aenter__()
+            try:
+                async for token in _iter_sse_tokens(byte_iter):
+                    yield token
+            finally:
+                await stream_ctx.__aexit__(None, None, None)
+
+    async def health_check(self) -> bool:
+        checked_at, healthy = self._last_health
+        now = time.monotonic()
+        if now - checked_at < self.HEALTH_TTL:
+            return healthy
+        transport = await self._get_transport()
+        try:
+            status, _ = await transport.get(f"{self.base_url}/health", 5.0)
+            healthy = status == 200
+        except _CLIENT_ERRORS:
+            healthy = False
+        # Failures on other endpoints reset the timestamp to 0.0 so the
+        # next check probes for real instead of serving a stale "up".
+        self._last_health = (now, healthy)
+        return healthy
+
+    async def get_model_info(self) -> Dict[str, Any]:
+        transport = await self._get_transport()
+        try:
+            status, body = await transport.get(f"{self.base_url}/v1/models", 10.0)
+            if status != 200:
+                if status >= 500:
+                    self._last_health = (0.0, False)
+                return {"error": f"unexpected status {status}"}
+            return _loads(body)
+        except _CLIENT_ERRORS as exc:
+            self._last_health = (0.0, False)
+            return {"error": str(exc)}
+
+
+# Module-level provider so one-shot helpers reuse the shared transport
+# and connection pool instead of constructing a provider per call.
+_default_provider = LocalDeepSeekProvider()
+
+
+async def quick_generate(prompt: str, **config_kwargs) -> str:
+    """One-shot completion helper for a plain text prompt."""
+    config = GenerationConfig(**config_kwargs) if config_kwargs else None
+    result = await _default_provider.generate_completion(
+        [{"role": "user", "content": prompt}], config
+    )
+    return result.get("content", "")